@@ -1,19 +1,29 @@
+import io
 import os
-import cv2
-import fitz  # PyMuPDF
+import re
 import json
-import tempfile
+import hashlib
 import configparser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from PIL import Image
-import pytesseract
-from google.cloud import vision
 import numpy as np
 
+try:
+    import orjson
+
+    def _json_line(obj):
+        return orjson.dumps(obj) + b"\n"
+except ImportError:  # orjson is optional; stdlib json produces the same lines, just slower
+    def _json_line(obj):
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
 # ----------------- 1. Load config -----------------
 config = configparser.ConfigParser()
 config.read("config.cfg")
 
 BLUR_SHARPNESS_THRESHOLD = float(config["OCR"].get("BLUR_SHARPNESS_THRESHOLD", 150.0))
+BLUR_CHECK_MAX_SIDE = int(config["OCR"].get("BLUR_CHECK_MAX_SIDE", 0))
 SAVE_ENHANCED_IMAGES = config["OCR"].getboolean("SAVE_ENHANCED_IMAGES", False)
 ENHANCED_DIR = config["OCR"].get("ENHANCED_DIR", "enhanced_pages")
 USE_VISION_FOR_BLUR = config["OCR"].getboolean("USE_VISION_FOR_BLUR", True)
@@ -25,66 +35,216 @@ LANG_HINT_TELUGU = config["OCR"].get("LANG_HINT_TELUGU", "te")
 WEIGHT_LENGTH = float(config["OCR"].get("WEIGHT_LENGTH", 0.5))
 WEIGHT_ALPHA = float(config["OCR"].get("WEIGHT_ALPHA", 0.3))
 WEIGHT_WORDLEN = float(config["OCR"].get("WEIGHT_WORDLEN", 0.2))
+DETECT_LANG_FOR_VISION = config["OCR"].getboolean("DETECT_LANG_FOR_VISION", True)
+USE_OCR_CACHE = config["OCR"].getboolean("USE_OCR_CACHE", True)
+OCR_CACHE_DIR = config["OCR"].get("OCR_CACHE_DIR", ".ocr_cache")
+OCR_WORKERS = int(config["OCR"].get("OCR_WORKERS", min(os.cpu_count() or 1, 4)))
+USE_PDF_TEXT_LAYER = config["OCR"].getboolean("USE_PDF_TEXT_LAYER", True)
+MIN_TEXT_LAYER_CHARS = int(config["OCR"].get("MIN_TEXT_LAYER_CHARS", 50))
+PDF_DPI = int(config["OCR"].get("PDF_DPI", 300))
+PDF_MIN_DPI = int(config["OCR"].get("PDF_MIN_DPI", 200))
+PDF_MAX_SIDE_PX = int(config["OCR"].get("PDF_MAX_SIDE_PX", 3508))
+TESSERACT_BINARIZE = config["OCR"].getboolean("TESSERACT_BINARIZE", True)
+ADAPTIVE_BLOCK_SIZE = int(config["OCR"].get("ADAPTIVE_BLOCK_SIZE", 31))
+ADAPTIVE_C = float(config["OCR"].get("ADAPTIVE_C", 10))
+AUTO_VISION_SKIP_SCORE = float(config["OCR"].get("AUTO_VISION_SKIP_SCORE", 3.0))
+WRITE_COMBINED_JSON = config["OCR"].getboolean("WRITE_COMBINED_JSON", True)
+VISION_BATCH_SIZE = int(config["OCR"].get("VISION_BATCH_SIZE", 16))
+VISION_WORKERS = int(config["OCR"].get("VISION_WORKERS", 8))
+VISION_IMAGE_FORMAT = config["OCR"].get("VISION_IMAGE_FORMAT", "jpeg").strip().lower()
+VISION_JPEG_QUALITY = int(config["OCR"].get("VISION_JPEG_QUALITY", 90))
 
 # ----------------- 2. Init engines -----------------
-pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
-vision_client = vision.ImageAnnotatorClient()
+# cv2, fitz, pytesseract and the Vision client are loaded on first use so importing this
+# module (API ingestion runner, pool workers) does not pay for engines a run never touches.
+_pytesseract = None
+_vision_client = None
+
+
+def _get_tesseract():
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+        _pytesseract = pytesseract
+    return _pytesseract
+
+
+def _get_vision():
+    """Return (vision module, shared ImageAnnotatorClient); credentials are resolved once."""
+    global _vision_client
+    from google.cloud import vision
+    if _vision_client is None:
+        _vision_client = vision.ImageAnnotatorClient()
+    return vision, _vision_client
 
 # ----------------- Utility funcs -----------------
-def detect_indic_language(image):
-    """Detect if page likely contains Telugu or Hindi (Devanagari)."""
-    sample = pytesseract.image_to_string(image, lang="eng")
-    if any("\u0C00" <= c <= "\u0C7F" for c in sample):  # Telugu block
+_TELUGU_RE = re.compile("[\u0C00-\u0C7F]")
+_DEVANAGARI_RE = re.compile("[\u0900-\u097F]")
+
+
+def detect_indic_language(text):
+    """Detect if OCR'd text likely contains Telugu or Hindi (Devanagari)."""
+    if _TELUGU_RE.search(text):  # Telugu block
         return "telugu"
-    if any("\u0900" <= c <= "\u097F" for c in sample):  # Devanagari block
+    if _DEVANAGARI_RE.search(text):  # Devanagari block
         return "hindi"
     return "none"
 
 
-def is_blurry(image, threshold=150.0):
-    """Check if image is blurry using Laplacian variance."""
-    gray = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2GRAY)
-    sharpness = cv2.Laplacian(gray, cv2.CV_64F).var()
+def is_blurry(image, threshold=150.0, max_side=0):
+    """Check if image is blurry using Laplacian variance.
+
+    With max_side > 0 the check runs on a downsampled copy; Laplacian variance grows as
+    resolution drops, so the threshold must be tuned for that size.
+    """
+    import cv2
+
+    gray = np.asarray(image.convert("L"))
+    if max_side and max(gray.shape) > max_side:
+        scale = max_side / max(gray.shape)
+        gray = cv2.resize(gray, (0, 0), fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
     return sharpness < threshold, sharpness
 
 
-# ----------------- OCR Engines -----------------
-def ocr_tesseract(image):
-    return pytesseract.image_to_string(image, lang="eng")
+# ----------------- OCR cache -----------------
+def image_cache_key(size, samples):
+    """Content hash of a page raster; identical pages (boilerplate, re-runs) share OCR results."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{size[0]}x{size[1]}".encode("ascii"))
+    h.update(samples)
+    return h.hexdigest()
 
 
-def ocr_google_vision(image, lang_hint=None):
-    """Run OCR with Google Vision API, Windows-safe temp file handling."""
-    with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp:
-        temp_path = temp.name
-        image.save(temp_path, format="PNG")
+def _cache_path(cache_key, engine, lang_hint):
+    return os.path.join(OCR_CACHE_DIR, f"{cache_key}.{engine}.{lang_hint or 'none'}.txt")
 
-    with open(temp_path, "rb") as img_file:
-        content = img_file.read()
 
+def cache_get(cache_key, engine, lang_hint=None):
+    if not cache_key:
+        return None
     try:
-        os.remove(temp_path)
-    except PermissionError:
-        print(f"[WARN] Could not delete temp file (still in use): {temp_path}")
-
-    image_obj = vision.Image(content=content)
-    response = vision_client.document_text_detection(
-        image=image_obj,
-        image_context={"language_hints": [lang_hint]} if lang_hint else None,
-    )
+        with open(_cache_path(cache_key, engine, lang_hint), "r", encoding="utf-8", newline="") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
 
-    if response.error.message:
-        raise RuntimeError(f"Vision API Error: {response.error.message}")
+def cache_put(cache_key, engine, lang_hint, text):
+    if not cache_key:
+        return
+    os.makedirs(OCR_CACHE_DIR, exist_ok=True)
+    path = _cache_path(cache_key, engine, lang_hint)
+    # Write-then-rename so concurrent workers never observe a partial entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
 
-    return response.full_text_annotation.text
+
+# ----------------- OCR Engines -----------------
+def binarize(image):
+    """Adaptive local-mean threshold; OpenCV's box-filtered mean is a single pass per pixel."""
+    import cv2
+
+    gray = np.asarray(image.convert("L"))
+    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY,
+                                   ADAPTIVE_BLOCK_SIZE, ADAPTIVE_C)
+    return Image.fromarray(binary)
+
+
+def ocr_tesseract(image, cache_key=None):
+    engine = "tesseract-bin" if TESSERACT_BINARIZE else "tesseract"
+    text = cache_get(cache_key, engine)
+    if text is None:
+        if TESSERACT_BINARIZE:
+            image = binarize(image)
+        text = _get_tesseract().image_to_string(image, lang="eng")
+        cache_put(cache_key, engine, None, text)
+    return text
+
+
+def _image_content(image):
+    """Encode a PIL image as PNG bytes for the Vision API, entirely in memory."""
+    buf = io.BytesIO()
+    # Fast zlib level: Vision only needs lossless pixels, not the smallest file
+    image.save(buf, format="PNG", compress_level=1)
+    return buf.getvalue()
+
+
+def _raw_content(size, samples):
+    """Encode raw RGB page samples for Vision without a PIL round-trip.
+
+    JPEG via OpenCV is several times cheaper than zlib-compressed PNG at 300 DPI.
+    """
+    if VISION_IMAGE_FORMAT != "jpeg":
+        return _image_content(Image.frombytes("RGB", size, samples))
+    import cv2
+
+    width, height = size
+    rgb = np.frombuffer(samples, dtype=np.uint8).reshape(height, width, 3)
+    ok, buf = cv2.imencode(".jpg", cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR),
+                           [cv2.IMWRITE_JPEG_QUALITY, VISION_JPEG_QUALITY])
+    if not ok:
+        raise RuntimeError("JPEG encoding failed")
+    return buf.tobytes()
+
+
+def ocr_google_vision_batch(contents, lang_hints, cache_keys=None):
+    """Run document text detection on many encoded images, VISION_BATCH_SIZE per RPC.
+
+    Cached pages are answered locally (their content may be None) and skipped in the RPCs.
+    """
+    cache_keys = cache_keys or [None] * len(contents)
+    texts = [cache_get(key, "vision", hint) for key, hint in zip(cache_keys, lang_hints)]
+    pending = [i for i, text in enumerate(texts) if text is None]
+    if not pending:
+        return texts
+
+    vision, vision_client = _get_vision()
+    feature = vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+
+    def annotate(chunk):
+        requests = []
+        for i in chunk:
+            request = {"image": vision.Image(content=contents[i]), "features": [feature]}
+            if lang_hints[i]:
+                request["image_context"] = {"language_hints": [lang_hints[i]]}
+            requests.append(vision.AnnotateImageRequest(**request))
+
+        response = vision_client.batch_annotate_images(requests=requests)
+        for i, res in zip(chunk, response.responses):
+            if res.error.message:
+                raise RuntimeError(f"Vision API Error: {res.error.message}")
+            texts[i] = res.full_text_annotation.text
+            cache_put(cache_keys[i], "vision", lang_hints[i], texts[i])
+
+    # Batch RPCs are network-bound (gRPC releases the GIL), so threads overlap them; the
+    # pool size caps how many are in flight against the per-minute quota
+    chunks = [pending[start:start + VISION_BATCH_SIZE] for start in range(0, len(pending), VISION_BATCH_SIZE)]
+    with ThreadPoolExecutor(max_workers=max(1, min(VISION_WORKERS, len(chunks)))) as pool:
+        for _ in pool.map(annotate, chunks):
+            pass
+    return texts
+
+
+def ocr_google_vision(image, lang_hint=None, cache_key=None):
+    """Run OCR with Google Vision API on a single image."""
+    if cache_get(cache_key, "vision", lang_hint) is None:
+        content = _image_content(image)
+    else:
+        content = None
+    return ocr_google_vision_batch([content], [lang_hint], [cache_key])[0]
 
 
 # ----------------- Confidence Scoring -----------------
 def compute_confidence(text):
+    # map() keeps the per-char/per-word counting in C instead of generator bytecode
     words = text.split()
     length = len(text)
-    alpha_ratio = sum(c.isalpha() for c in text) / max(1, len(text))
-    avg_wordlen = sum(len(w) for w in words) / max(1, len(words))
+    alpha_ratio = sum(map(str.isalpha, text)) / max(1, length)
+    avg_wordlen = sum(map(len, words)) / max(1, len(words))
     score = (WEIGHT_LENGTH * (length / 1000.0) +
              WEIGHT_ALPHA * alpha_ratio +
              WEIGHT_WORDLEN * avg_wordlen)
@@ -97,77 +257,113 @@ def compute_confidence(text):
 
 
 # ----------------- PDF to images -----------------
+def _page_dpi(page):
+    """Render at PDF_DPI, lowering it (not below PDF_MIN_DPI) for oversized pages."""
+    longest_in = max(page.rect.width, page.rect.height) / 72.0
+    if not longest_in:
+        return PDF_DPI
+    return round(max(PDF_MIN_DPI, min(PDF_DPI, PDF_MAX_SIDE_PX / longest_in)))
+
+
 def pdf_to_images(pdf_path):
+    """Yield (page_num, (width, height), rgb_bytes, text) so pages can be shipped to workers cheaply.
+
+    Digital-born pages with an extractable text layer are not rendered at all: they are
+    yielded as (page_num, None, None, text) and never reach OCR.
+    """
+    import fitz  # PyMuPDF
+
     doc = fitz.open(pdf_path)
     for i, page in enumerate(doc, start=1):
-        pix = page.get_pixmap(dpi=300)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        yield i, img
+        if USE_PDF_TEXT_LAYER:
+            text = page.get_text("text")
+            if len(text.strip()) >= MIN_TEXT_LAYER_CHARS:
+                yield i, None, None, text
+                continue
+        pix = page.get_pixmap(dpi=_page_dpi(page))
+        yield i, (pix.width, pix.height), pix.samples, None
 
 
 # ----------------- Page Processor -----------------
-def process_page(img, page_id, results, filetype="image"):
-    lang_detected = detect_indic_language(img)
+def plan_page(img, page_id, filetype="image", log=print, cache_key=None):
+    """Pass 1: detect language/blur and decide which engine(s) a page needs.
+
+    Tesseract runs here since it is local; Vision work is deferred so it can be batched.
+    The single english Tesseract pass doubles as the language detector.
+    """
+    engine_choice = DEFAULT_ENGINE_PDF if filetype == "pdf" else DEFAULT_ENGINE_IMAGE
+    # Vision-only routing needs the english pass just to pick a language hint
+    text_tess = None
+    if engine_choice != "vision" or DETECT_LANG_FOR_VISION:
+        text_tess = ocr_tesseract(img, cache_key)
+
+    lang_detected = detect_indic_language(text_tess) if text_tess is not None else "unknown"
     lang_hint = None
     if lang_detected == "hindi":
         lang_hint = LANG_HINT_HINDI
     elif lang_detected == "telugu":
         lang_hint = LANG_HINT_TELUGU
 
-    print(f"[INFO] Page {page_id}: Detected {lang_detected}")
+    log(f"[INFO] Page {page_id}: Detected {lang_detected}")
+    plan = {"page": page_id, "language_detected": lang_detected, "lang_hint": lang_hint,
+            "text_tess": text_tess, "cache_key": cache_key}
 
     # 🔍 Blur detection
     if USE_VISION_FOR_BLUR:
-        blurry, sharpness = is_blurry(img, BLUR_SHARPNESS_THRESHOLD)
-        print(f"[INFO] Page {page_id}: Sharpness={sharpness:.2f} → {'BLURRY' if blurry else 'CLEAR'}")
+        blurry, sharpness = is_blurry(img, BLUR_SHARPNESS_THRESHOLD, BLUR_CHECK_MAX_SIDE)
+        log(f"[INFO] Page {page_id}: Sharpness={sharpness:.2f} → {'BLURRY' if blurry else 'CLEAR'}")
         if blurry:
-            text = ocr_google_vision(img, lang_hint)
-            metrics = compute_confidence(text)
-            results.append({
-                "page": page_id,
-                "language_detected": lang_detected,
-                "engine": "vision (blur-forced)",
-                "sharpness": sharpness,
-                "text": text,
-                "metrics": metrics,
-            })
-            return text
+            plan.update(engine="vision (blur-forced)", sharpness=sharpness)
+            return plan
 
     # Indic rerouting
     if USE_VISION_FOR_INDIC and lang_detected in ("hindi", "telugu"):
-        text = ocr_google_vision(img, lang_hint)
-        metrics = compute_confidence(text)
-        results.append({
-            "page": page_id,
-            "language_detected": lang_detected,
-            "engine": "vision (indic-forced)",
-            "text": text,
-            "metrics": metrics,
-        })
-        return text
-
-    # Engine routing by config
-    engine_choice = DEFAULT_ENGINE_PDF if filetype == "pdf" else DEFAULT_ENGINE_IMAGE
-    if engine_choice in ("tesseract", "vision"):
-        if engine_choice == "tesseract":
-            text = ocr_tesseract(img)
-        else:
-            text = ocr_google_vision(img, lang_hint)
-        metrics = compute_confidence(text)
-        results.append({
-            "page": page_id,
-            "language_detected": lang_detected,
-            "engine": engine_choice,
-            "text": text,
-            "metrics": metrics,
-        })
-        return text
-
-    # Auto mode → run both
-    text_tess = ocr_tesseract(img)
-    text_vision = ocr_google_vision(img, lang_hint)
+        plan["engine"] = "vision (indic-forced)"
+        return plan
+
+    # Engine routing by config; anything other than tesseract/vision means auto → run both
+    plan["engine"] = engine_choice if engine_choice in ("tesseract", "vision") else "auto"
+    if plan["engine"] == "auto" and AUTO_VISION_SKIP_SCORE > 0:
+        # A confident Tesseract read makes the Vision comparison not worth an RPC
+        score = compute_confidence(text_tess)["confidence_score"]
+        plan["skip_vision"] = score >= AUTO_VISION_SKIP_SCORE
+        if plan["skip_vision"]:
+            log(f"[INFO] Page {page_id}: Tesseract confidence {score:.2f} → skipping Vision")
+    return plan
+
+
+def needs_vision(plan):
+    return plan["engine"] not in ("tesseract", "pdf-text") and not plan.get("skip_vision")
+
+
+def finish_page(plan, text_vision=None):
+    """Pass 2: turn a planned page (plus its Vision text, if any) into (result, text)."""
+    engine = plan["engine"]
+    base = {"page": plan["page"], "language_detected": plan["language_detected"]}
 
+    if engine != "auto":
+        if engine == "pdf-text":
+            text = plan["text"]
+        else:
+            text = plan["text_tess"] if engine == "tesseract" else text_vision
+        result = {**base, "engine": engine}
+        if "sharpness" in plan:
+            result["sharpness"] = plan["sharpness"]
+        result.update(text=text, metrics=compute_confidence(text))
+        return result, text
+
+    text_tess = plan["text_tess"]
     metrics_tess = compute_confidence(text_tess)
+    if plan.get("skip_vision"):
+        result = {
+            **base,
+            "tesseract": {"text": text_tess, "metrics": metrics_tess},
+            "vision": None,
+            "chosen_engine": "tesseract",
+            "final_text": text_tess,
+            "final_confidence": metrics_tess["confidence_score"],
+        }
+        return result, text_tess
     metrics_vision = compute_confidence(text_vision)
 
     chosen, final_text, final_metrics = (
@@ -176,51 +372,136 @@ def process_page(img, page_id, results, filetype="image"):
         else ("vision", text_vision, metrics_vision)
     )
 
-    results.append({
-        "page": page_id,
-        "language_detected": lang_detected,
+    result = {
+        **base,
         "tesseract": {"text": text_tess, "metrics": metrics_tess},
         "vision": {"text": text_vision, "metrics": metrics_vision},
         "chosen_engine": chosen,
         "final_text": final_text,
         "final_confidence": final_metrics["confidence_score"],
-    })
-    return final_text
+    }
+    return result, final_text
 
 
-# ----------------- Adapter -----------------
-def ocr_adapter(file_path):
-    results, all_text = [], []
-
-    if file_path.lower().endswith(".pdf"):
-        for page_num, img in pdf_to_images(file_path):
-            page_text = process_page(img, page_num, results, filetype="pdf")
-            all_text.append(page_text)
+def process_page(img, page_id, results, filetype="image", log=print, use_cache=None):
+    """OCR a single page end to end (used for standalone images)."""
+    if USE_OCR_CACHE if use_cache is None else use_cache:
+        cache_key = image_cache_key(img.size, img.mode.encode("ascii") + img.tobytes())
     else:
-        img = Image.open(file_path)
-        page_text = process_page(img, "image", results, filetype="image")
-        all_text.append(page_text)
+        cache_key = None
+    plan = plan_page(img, page_id, filetype=filetype, log=log, cache_key=cache_key)
+    text_vision = ocr_google_vision(img, plan["lang_hint"], cache_key) if needs_vision(plan) else None
+    result, text = finish_page(plan, text_vision)
+    results.append(result)
+    return text
 
-    output = {
-        "file": os.path.basename(file_path),
-        "results": results
-    }
-    with open("ocr_results.json", "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
 
-    print("[INFO] Saved structured OCR output → ocr_results.json")
-    return "\n".join(all_text)
+def _plan_pdf_page(page_num, size, samples, use_cache):
+    """Worker entry point: rebuild the page image and run pass 1 in a child process.
+
+    Log lines are returned instead of printed so the parent keeps control of stdout.
+    Vision-bound pages carry their encoded image back for the batched pass unless cached.
+    """
+    img = Image.frombytes("RGB", size, samples)
+    cache_key = image_cache_key(size, samples) if use_cache else None
+    logs = []
+    plan = plan_page(img, page_num, filetype="pdf", log=logs.append, cache_key=cache_key)
+    if needs_vision(plan) and cache_get(cache_key, "vision", plan["lang_hint"]) is None:
+        plan["content"] = _raw_content(size, samples)
+    return plan, logs
+
+
+# ----------------- Adapter -----------------
+def ocr_adapter(file_path, use_cache=None):
+    """OCR a PDF or image and return its text.
+
+    Page results are streamed to ocr_results.jsonl as soon as each page is final (completion
+    order, one JSON object per line); ocr_results.meta.json names the source file. The
+    combined, page-ordered ocr_results.json is still written when WRITE_COMBINED_JSON is set.
+    """
+    if use_cache is None:
+        use_cache = USE_OCR_CACHE
+    pages = {}  # page id -> (result or None when not needed, text)
+
+    with open("ocr_results.meta.json", "w", encoding="utf-8") as f:
+        json.dump({"file": os.path.basename(file_path), "results": "ocr_results.jsonl"}, f, ensure_ascii=False)
+
+    with open("ocr_results.jsonl", "wb") as stream:
+        def emit(plan, text_vision=None):
+            result, page_text = finish_page(plan, text_vision)
+            pages[plan["page"]] = (result if WRITE_COMBINED_JSON else None, page_text)
+            stream.write(_json_line(result))
+            stream.flush()
+
+        if file_path.lower().endswith(".pdf"):
+            # Pass 1: pages are independent, so render here and classify/Tesseract in workers;
+            # pages with a usable text layer skip OCR entirely. At most 2 pages per worker are
+            # in flight, so rendered rasters do not pile up for the whole PDF
+            vision_plans, futures = [], deque()
+            max_in_flight = 2 * max(1, OCR_WORKERS)
+
+            def collect(fut):
+                plan, logs = fut.result()
+                for line in logs:
+                    print(line)
+                if needs_vision(plan):
+                    vision_plans.append(plan)
+                else:
+                    emit(plan)
+
+            with ProcessPoolExecutor(max_workers=max(1, OCR_WORKERS)) as pool:
+                for page_num, size, samples, text in pdf_to_images(file_path):
+                    if text is not None:
+                        print(f"[INFO] Page {page_num}: Using embedded text layer")
+                        emit({"page": page_num, "language_detected": detect_indic_language(text),
+                              "engine": "pdf-text", "text": text})
+                        continue
+                    if len(futures) >= max_in_flight:
+                        collect(futures.popleft())  # oldest first keeps page-order logs
+                    futures.append(pool.submit(_plan_pdf_page, page_num, size, samples, use_cache))
+                while futures:
+                    collect(futures.popleft())
+
+            # Pass 2: every Vision-bound page goes out in as few batch RPCs as possible
+            vision_plans.sort(key=lambda p: p["page"])
+            vision_texts = ocr_google_vision_batch(
+                [plan.pop("content", None) for plan in vision_plans],
+                [plan["lang_hint"] for plan in vision_plans],
+                [plan["cache_key"] for plan in vision_plans],
+            )
+            for plan, text_vision in zip(vision_plans, vision_texts):
+                emit(plan, text_vision)
+        else:
+            img = Image.open(file_path)
+            results = []
+            page_text = process_page(img, "image", results, filetype="image", use_cache=use_cache)
+            pages["image"] = (results[0], page_text)
+            stream.write(_json_line(results[0]))
+
+    print("[INFO] Streamed per-page OCR output → ocr_results.jsonl")
+    ordered = [pages[k] for k in sorted(pages)]
+
+    if WRITE_COMBINED_JSON:
+        output = {
+            "file": os.path.basename(file_path),
+            "results": [result for result, _ in ordered]
+        }
+        with open("ocr_results.json", "w", encoding="utf-8") as f:
+            json.dump(output, f, ensure_ascii=False, indent=2)
+        print("[INFO] Saved structured OCR output → ocr_results.json")
+    return "\n".join(text for _, text in ordered)
 
 
 # ----------------- Main -----------------
 if __name__ == "__main__":
     import sys
-    if len(sys.argv) < 2:
-        print("Usage: python ocr_adapter_blur.py <file>")
+    args = [a for a in sys.argv[1:] if a != "--no-cache"]
+    if not args:
+        print("Usage: python ocr_adapter_blur.py <file> [--no-cache]")
         sys.exit(1)
 
-    file_path = sys.argv[1]
+    file_path = args[0]
     print(f"[INFO] Processing {file_path}...")
-    text = ocr_adapter(file_path)
+    text = ocr_adapter(file_path, use_cache=False if "--no-cache" in sys.argv else None)
     print("===== FINAL OCR TEXT =====")
     print(text)
@@ -1,6 +1,8 @@
 from __future__ import annotations
+import asyncio
 import os
-from typing import Any, Dict, List, Optional
+from functools import lru_cache, partial
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
@@ -39,6 +41,82 @@ class RetrieveResponse(BaseModel):
 # Precompile graph once
 _retrieve_graph = build_retrieve_graph()
 
+
+@lru_cache(maxsize=2)
+def _get_answer_pipeline(model_name: str):
+    """Load the answer model once per process; building it costs seconds and hundreds of MB."""
+    import torch
+    from transformers import pipeline
+    pipe = pipeline("text2text-generation", model=model_name, device=0 if torch.cuda.is_available() else -1)
+    # Batched calls pad prompts to a common length; decoder-only models must pad on the left
+    tokenizer = pipe.tokenizer
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    if not getattr(pipe.model.config, "is_encoder_decoder", False):
+        tokenizer.padding_side = "left"
+    return pipe
+
+
+class _AnswerBatcher:
+    """Collects prompts from concurrent requests and runs them through one pipeline call.
+
+    Requests arriving within ``window`` seconds of each other (up to ``max_batch``) share a
+    forward pass; generation runs in a worker thread so the event loop stays responsive.
+    """
+
+    def __init__(self, window: float, max_batch: int):
+        self.window = window
+        self.max_batch = max(1, max_batch)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def generate(self, model_name: str, prompt: str, gen_kwargs: Dict[str, Any]) -> str:
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((model_name, tuple(sorted(gen_kwargs.items())), prompt, fut))
+        return await fut
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Only prompts with the same model and generation settings can share a call
+            groups: Dict[Tuple[str, tuple], List[tuple]] = {}
+            for item in batch:
+                groups.setdefault((item[0], item[1]), []).append(item)
+            for (model_name, kwargs), items in groups.items():
+                try:
+                    pipe = await loop.run_in_executor(None, _get_answer_pipeline, model_name)
+                    # Without batch_size the pipeline still runs one forward pass per prompt
+                    outputs = await loop.run_in_executor(None, partial(pipe, [i[2] for i in items], batch_size=len(items), **dict(kwargs)))
+                    for (_, _, _, fut), out in zip(items, outputs):
+                        out = out[0] if isinstance(out, list) else out
+                        if not fut.done():
+                            fut.set_result(out["generated_text"])
+                except Exception as e:  # pragma: no cover
+                    for *_, fut in items:
+                        if not fut.done():
+                            fut.set_exception(e)
+
+
+_answer_batcher = _AnswerBatcher(
+    window=float(os.getenv("ANSWER_BATCH_WINDOW_MS", "50")) / 1000.0,
+    max_batch=int(os.getenv("ANSWER_MAX_BATCH", "8")),
+)
+
 @app.get("/health")
 async def health():
     return {"ok": True}
@@ -88,16 +166,17 @@ async def retrieve(req: RetrieveRequest):
     chroma_avail = bool(result.get("chroma_available", result.get("chroma_ids")))
     kg_avail = bool(result.get("kg_available", result.get("kg_ids")))
 
-    docs: List[RetrievedDoc] = []
-    for cid, text in zip(final_ids, final_docs):
-        docs.append(RetrievedDoc(
+    docs: List[RetrievedDoc] = [
+        RetrievedDoc(
             id=str(cid),
             title=None,
             snippet=(text or "")[:400],
             score=0.0,  # placeholder (embedding similarity not currently captured in state)
             provenance=prov.get(cid),
             provenance_extra=prov_extra.get(cid),
-        ))
+        )
+        for cid, text in zip(final_ids, final_docs)
+    ]
 
     answer: Optional[str] = None
     if req.with_answer and docs:
@@ -107,8 +186,8 @@ async def retrieve(req: RetrieveRequest):
         prompt_parts = []
         total = 0
         for i, d in enumerate(top_docs, start=1):
-            snippet = (d.snippet or "").replace("\n", " ").strip()
-            snippet = snippet[:400]
+            # d.snippet is already capped at 400 chars
+            snippet = d.snippet.replace("\n", " ").strip()
             seg = f"[{i}] {snippet}"
             if total + len(seg) > max_chars: break
             prompt_parts.append(seg); total += len(seg)
@@ -119,15 +198,12 @@ async def retrieve(req: RetrieveRequest):
             "If the answer cannot be determined from the excerpts, say you cannot determine.\n\n"
             f"Question: {user_q}\n\nContext:\n{context_block}\n\nAnswer:" )
         try:
-            from transformers import pipeline
             model_name = os.getenv("ANSWER_MODEL", "google/flan-t5-base")
-            pipe = pipeline("text2text-generation", model=model_name)
-            gen = pipe(
-                template,
-                max_new_tokens=int(os.getenv("ANSWER_MAX_NEW_TOKENS", "256")),
-                temperature=float(os.getenv("ANSWER_TEMPERATURE", "0")),
-            )
-            raw_ans = gen[0]['generated_text'].strip()
+            gen_text = await _answer_batcher.generate(model_name, template, {
+                "max_new_tokens": int(os.getenv("ANSWER_MAX_NEW_TOKENS", "256")),
+                "temperature": float(os.getenv("ANSWER_TEMPERATURE", "0")),
+            })
+            raw_ans = gen_text.strip()
             if "[1]" not in raw_ans and len(top_docs) > 1:
                 src_nums = ",".join(str(i+1) for i in range(len(top_docs)))
                 raw_ans += f"\n\nSources: {src_nums}"
@@ -1,5 +1,7 @@
 from __future__ import annotations
 import argparse
+import functools
+import itertools
 import json
 import sys
 from typing import Any, Iterable, Tuple
@@ -53,42 +55,36 @@ def _coerce_nodes_edges_from_graph_obj(graph_obj: Any) -> Tuple[list[str], list[
     raise RuntimeError("Unable to extract nodes/edges from the provided graph object")
 
 
+_MERMAID_ID_TABLE = str.maketrans({" ": "_", "-": "_", ".": "_", ":": "_", "[": None, "]": None, "'": None})
+
+
 def _to_mermaid(nodes: Iterable[str], edges: Iterable[tuple[str, str]]) -> str:
     def norm(n: str) -> str:
-        return (
-            n.replace(" ", "_")
-             .replace("-", "_")
-             .replace(".", "_")
-             .replace(":", "_")
-             .replace("[", "")
-             .replace("]", "")
-             .replace("'", "")
-        )
-
-    lines = ["flowchart TD"]
-    declared = set()
+        return n.translate(_MERMAID_ID_TABLE)
+
+    # First label wins when two node names normalize to the same Mermaid id
+    declared: dict[str, str] = {}
     for n in nodes:
-        nn = norm(n)
-        if nn not in declared:
-            lines.append(f"  {nn}[{n}]")
-            declared.add(nn)
-    for u, v in edges:
-        lines.append(f"  {norm(u)} --> {norm(v)}")
-    return "\n".join(lines)
+        declared.setdefault(norm(n), n)
+    return "\n".join(itertools.chain(
+        ["flowchart TD"],
+        (f"  {nn}[{n}]" for nn, n in declared.items()),
+        (f"  {norm(u)} --> {norm(v)}" for u, v in edges),
+    ))
 
 
 def _to_dot(nodes: Iterable[str], edges: Iterable[tuple[str, str]]) -> str:
     def q(n: str) -> str:
         return '"' + n.replace('"', '\\"') + '"'
-    lines = ["digraph G {"]
-    for n in nodes:
-        lines.append(f"  {q(n)};")
-    for u, v in edges:
-        lines.append(f"  {q(u)} -> {q(v)};")
-    lines.append("}")
-    return "\n".join(lines)
+    return "\n".join(itertools.chain(
+        ["digraph G {"],
+        (f"  {q(n)};" for n in nodes),
+        (f"  {q(u)} -> {q(v)};" for u, v in edges),
+        ["}"],
+    ))
 
 
+@functools.lru_cache(maxsize=None)
 def _build_graph_object(which: str) -> Any:
     from . import graph as g
 
@@ -108,13 +104,12 @@ def _build_graph_object(which: str) -> Any:
     if not callable(builder):
         raise RuntimeError(f"No graph builder found for '{which}'. Tried: {candidates}")
     obj = builder()
-    # If it's a StateGraph, it may already be compiled; compile() if available
+    # build_*_graph() normally returns a compiled graph already; only compile a raw StateGraph
+    if hasattr(obj, "get_graph"):
+        return obj
     compile_fn = getattr(obj, "compile", None)
     if callable(compile_fn):
-        try:
-            obj = compile_fn()
-        except TypeError:
-            obj = compile_fn()
+        obj = compile_fn()
     return obj
 
 
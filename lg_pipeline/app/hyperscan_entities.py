@@ -0,0 +1,141 @@
+"""
+Document-level regex entity extraction with Hyperscan (optional dependency).
+
+All single-token regexes from ``legal_patterns`` are compiled into one Hyperscan
+database and the whole document is scanned in a single pass, instead of testing
+every regex against every token through the EntityRuler. Multi-token rules are
+token sequences and stay on the ruler; matches here are not confined to one token.
+
+The compiled database is serialized to disk keyed by a hash of the patterns, so
+compilation is paid once per pattern set.
+"""
+
+from __future__ import annotations
+
+import bisect
+import hashlib
+import os
+import tempfile
+from typing import List, Optional, Tuple
+
+try:
+    import hyperscan  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    hyperscan = None
+
+from app.legal_patterns import token_regexes
+
+CACHE_DIR = os.environ.get("LG_HYPERSCAN_CACHE", os.path.join(tempfile.gettempdir(), "lg_hyperscan"))
+
+_DB = None
+_ENTRIES: List[Tuple[str, str]] = []  # hyperscan id -> (pattern id, label)
+
+
+def available() -> bool:
+    return hyperscan is not None
+
+
+def _expressions() -> Tuple[List[bytes], List[int]]:
+    exprs, flags = [], []
+    for _, _, regex in token_regexes():
+        flag = hyperscan.HS_FLAG_SOM_LEFTMOST
+        if regex.startswith("(?i)"):
+            regex = regex[4:]
+            flag |= hyperscan.HS_FLAG_CASELESS
+        exprs.append(regex.encode("utf-8"))
+        flags.append(flag | hyperscan.HS_FLAG_UTF8)
+    return exprs, flags
+
+
+def load_database():
+    """Compile (or load from the on-disk cache) the Hyperscan database for the legal patterns."""
+    global _DB, _ENTRIES
+    if _DB is not None:
+        return _DB
+    if hyperscan is None:
+        raise RuntimeError("hyperscan is not installed; pip install hyperscan or use the EntityRuler")
+
+    exprs, flags = _expressions()
+    digest = hashlib.sha1(b"\0".join(exprs) + bytes(str(flags), "ascii")).hexdigest()[:16]
+    path = os.path.join(CACHE_DIR, f"legal_patterns.{digest}.hsdb")
+    db = None
+    if os.path.exists(path):
+        try:
+            with open(path, "rb") as f:
+                db = hyperscan.loadb(f.read())
+        except Exception:
+            db = None
+    if db is None:
+        db = hyperscan.Database()
+        db.compile(expressions=exprs, ids=list(range(len(exprs))), elements=len(exprs), flags=flags)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(hyperscan.dumpb(db))
+            os.replace(tmp, path)
+        except OSError:
+            pass  # cache is best-effort
+
+    _ENTRIES = [(pid, label) for pid, label, _ in token_regexes()]
+    _DB = db
+    return db
+
+
+def scan(text: str) -> List[Tuple[int, int, str, str]]:
+    """Return ``(start_char, end_char, label, pattern_id)`` for every match in ``text``."""
+    db = load_database()
+    data = text.encode("utf-8")
+    hits: List[Tuple[int, int, int]] = []
+
+    def on_match(idx: int, start: int, end: int, flags: int, context: Optional[object]) -> None:
+        hits.append((start, end, idx))
+
+    db.scan(data, match_event_handler=on_match)
+
+    if len(data) == len(text):
+        to_char = None
+    else:
+        # Byte offset of each character, so UTF-8 offsets can be mapped back with bisect
+        byte_starts, pos = [], 0
+        for ch in text:
+            byte_starts.append(pos)
+            pos += len(ch.encode("utf-8"))
+        to_char = byte_starts
+
+    out = []
+    for start, end, idx in hits:
+        if to_char is not None:
+            start = bisect.bisect_left(to_char, start)
+            end = bisect.bisect_left(to_char, end)
+        pid, label = _ENTRIES[idx]
+        out.append((start, end, label, pid))
+    return out
+
+
+def add_hyperscan_ruler(nlp, before: Optional[str] = None):
+    """Register and add a ``hyperscan_ruler`` component that sets regex entities on the doc."""
+    from spacy.language import Language
+    from app.span_filter import filter_spans
+
+    load_database()
+
+    if not Language.has_factory("hyperscan_ruler"):
+        @Language.component("hyperscan_ruler")
+        def hyperscan_ruler_component(doc):
+            spans = []
+            for start, end, label, pid in scan(doc.text):
+                span = doc.char_span(start, end, label=label, span_id=pid, alignment_mode="expand")
+                if span is not None:
+                    spans.append(span)
+            if spans:
+                # Like overwrite_ents=False on the ruler: keep existing entities, add disjoint hits
+                existing = list(doc.ents)
+                taken = {i for ent in existing for i in range(ent.start, ent.end)}
+                new = [sp for sp in filter_spans(spans) if taken.isdisjoint(range(sp.start, sp.end))]
+                doc.ents = existing + new
+            return doc
+
+    if before and before in nlp.pipe_names:
+        return nlp.add_pipe("hyperscan_ruler", before=before)
+    return nlp.add_pipe("hyperscan_ruler")
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import functools
 import re
 import unicodedata
 from typing import List
@@ -6,6 +7,12 @@ from typing import List
 ZERO_WIDTH = [
     "\u200b", "\u200c", "\u200d", "\ufeff",
 ]
+# Zero-width removal and curly-quote folding in a single C-level pass
+_UNICODE_TABLE = str.maketrans({
+    **{zw: None for zw in ZERO_WIDTH},
+    "\u2018": "'", "\u2019": "'",
+    "\u201C": '"', "\u201D": '"',
+})
 STOPWORDS = {
     # include plain and dotted forms
     "v", "v.", "vs", "vs.", "versus", "petitioner", "respondent", "appellant", "judgment", "order", "the",
@@ -18,6 +25,15 @@ ABBREV_MAP = {
 # Allow optional hyphen-letter suffix like "IV-A" -> capture A as tail
 # Require at least one whitespace after S./Sec to avoid matching tokens like "SLP"
 SECTION_PAT = re.compile(r"\b(?:s\.?\s+|sec(?:tion)?\s+)([ivxlcdm]+|\d+)(?:-?([A-Za-z]\w*))?\b", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+_INITIALS_RE = re.compile(r"\b(?:[A-Za-z]\.\s*){2,}\s*")
+_LETTER_RE = re.compile(r"[A-Za-z]")
+_SINGLE_INITIAL_RE = re.compile(r"\b([A-Za-z])\.")
+_ABBREV_RE = re.compile(r"\b(?:SC|HC)\b\.?", re.IGNORECASE)
+_ROMAN_RE = re.compile(r"[ivxlcdm]+", re.IGNORECASE)
+_FOOTNOTE_RE = re.compile(r"(\b[A-Za-z][A-Za-z\s]*?)(?:\[\d+\]|(\d+))\b")
+_JUDGE_RE = re.compile(r"\bJ\.\]?\s*$")
+_DASH_RE = re.compile(r"[\u2013\u2014\-–—]+")
 ROMAN_MAP = {
     'M': 1000, 'CM': 900, 'D': 500, 'CD': 400,
     'C': 100,  'XC': 90,  'L': 50,  'XL': 40,
@@ -28,19 +44,15 @@ ROMAN_MAP = {
 def normalize_unicode(text: str) -> str:
     if not text:
         return ""
-    t = unicodedata.normalize("NFKC", text)
-    for zw in ZERO_WIDTH:
-        t = t.replace(zw, "")
-    t = t.replace("\u2018", "'").replace("\u2019", "'")
-    t = t.replace("\u201C", '"').replace("\u201D", '"')
-    t = re.sub(r"\s+", " ", t).strip()
+    t = unicodedata.normalize("NFKC", text).translate(_UNICODE_TABLE)
+    t = _WS_RE.sub(" ", t).strip()
     return t
 
 
 def strip_stopwords(text: str) -> str:
     if not text:
         return ""
-    tokens = re.split(r"\s+", text)
+    tokens = _WS_RE.split(text)
     out: List[str] = []
     for tok in tokens:
         low = tok.lower().strip(".,:;()[]{}\"")
@@ -56,14 +68,14 @@ def collapse_initials(text: str) -> str:
     # Collapse sequences like "V.R." or "R.K." or "S. K." -> "vr", "rk", "sk" (lowercase)
     def repl(m: re.Match[str]) -> str:
         s = m.group(0)
-        letters = re.findall(r"[A-Za-z]", s)
+        letters = _LETTER_RE.findall(s)
         # Preserve a single trailing space if the matched chunk ended with whitespace
         spacer = " " if s.endswith(" ") else ""
         return "".join(letters).lower() + spacer
     # Also consume optional trailing whitespace to preserve a single separator
-    t = re.sub(r"\b(?:[A-Za-z]\.\s*){2,}\s*", repl, text)
+    t = _INITIALS_RE.sub(repl, text)
     # Remove stray dots next to single initials (e.g., "S.")
-    t = re.sub(r"\b([A-Za-z])\.", r"\1", t)
+    t = _SINGLE_INITIAL_RE.sub(r"\1", t)
     return t
 
 
@@ -71,11 +83,26 @@ def expand_abbreviations(text: str) -> str:
     def repl(m: re.Match[str]) -> str:
         key = m.group(0).lower().rstrip('.')
         return ABBREV_MAP.get(key, m.group(0))
-    return re.sub(r"\b(?:SC|HC)\b\.?", repl, text, flags=re.IGNORECASE)
+    return _ABBREV_RE.sub(repl, text)
+
+
+def _to_roman(n: int) -> str:
+    out = []
+    for sym, val in sorted(ROMAN_MAP.items(), key=lambda kv: kv[1], reverse=True):
+        count, n = divmod(n, val)
+        out.append(sym * count)
+    return "".join(out)
+
+
+# Canonical numerals cover practically every section reference; the parser handles the rest
+_ROMAN_CACHE = {_to_roman(i): i for i in range(1, 400)}
 
 
 def roman_to_int(roman: str) -> int:
     s = roman.upper()
+    cached = _ROMAN_CACHE.get(s)
+    if cached is not None:
+        return cached
     i = 0
     val = 0
     while i < len(s):
@@ -92,42 +119,41 @@ def normalize_sections(text: str) -> str:
     def repl(m: re.Match[str]) -> str:
         num = m.group(1)
         tail = m.group(2) or ""
-        if re.fullmatch(r"[ivxlcdm]+", num, flags=re.IGNORECASE):
+        if _ROMAN_RE.fullmatch(num):
             num = str(roman_to_int(num))
         return f"section {num}{tail.lower()}"
     return SECTION_PAT.sub(repl, text)
 
 
+_PHON_STRIP_RE = re.compile(r"[^A-Za-z]")
+_RUN_COLLAPSE_RE = re.compile(r"(\d)\1+")
+# Soundex digit classes; vowels and H/W/Y are dropped in the same translate pass
+_SOUNDEX_TABLE = str.maketrans(
+    "BFPVCGJKQSXZDTLMNR",
+    "111122222222334556",
+    "AEIOUYHW",
+)
+
+
 def phonetic_key(text: str) -> str:
     # Simple Soundex variant (ASCII letters only)
-    t = re.sub(r"[^A-Za-z]", "", text).upper()
+    t = _PHON_STRIP_RE.sub("", text).upper()
     if not t:
         return ""
-    first = t[0]
-    tail = t[1:]
-    trans = str.maketrans({
-        'B':'1','F':'1','P':'1','V':'1',
-        'C':'2','G':'2','J':'2','K':'2','Q':'2','S':'2','X':'2','Z':'2',
-        'D':'3','T':'3',
-        'L':'4',
-        'M':'5','N':'5',
-        'R':'6'
-    })
-    digits = tail.translate(trans)
-    digits = re.sub(r"[AEIOUYHW]", "", digits)
-    digits = re.sub(r"(\d)\1+", r"\1", digits)
-    code = (first + digits + "000")[:4]
-    return code
+    digits = _RUN_COLLAPSE_RE.sub(r"\1", t[1:].translate(_SOUNDEX_TABLE))
+    return (t[0] + digits + "000")[:4]
 
 
+# Entity strings (statutes, courts, judges) recur heavily across a corpus
+@functools.lru_cache(maxsize=8192)
 def normalize_legal_entity(text: str) -> str:
     t = normalize_unicode(text)
     # remove trailing bracketed or inline numeric footnote markers (e.g., Somasundaram4, Name[12])
-    t = re.sub(r"(\b[A-Za-z][A-Za-z\s]*?)(?:\[\d+\]|(\d+))\b", r"\1", t)
+    t = _FOOTNOTE_RE.sub(r"\1", t)
     # remove a trailing judge marker 'J.' while preserving the name content
-    t = re.sub(r"\bJ\.\]?\s*$", "", t.strip())
+    t = _JUDGE_RE.sub("", t.strip())
     # strip honorifics at token boundaries
-    tokens = [tok for tok in re.split(r"\s+", t) if tok]
+    tokens = [tok for tok in _WS_RE.split(t) if tok]
     kept = []
     for tok in tokens:
         low = tok.lower().strip(".,:;()[]{}\"")
@@ -144,8 +170,8 @@ def normalize_legal_entity(text: str) -> str:
     # normalize section references
     t = normalize_sections(t)
     # remove leftover punctuation noise and lowercase
-    t = re.sub(r"[\u2013\u2014\-–—]+", " ", t)
-    t = re.sub(r"\s+", " ", t).strip().casefold()
+    t = _DASH_RE.sub(" ", t)
+    t = _WS_RE.sub(" ", t).strip().casefold()
     # collapse all whitespace for canonical matching
-    t = re.sub(r"\s+", "", t)
+    t = _WS_RE.sub("", t)
     return t
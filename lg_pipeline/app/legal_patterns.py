@@ -1,42 +1,91 @@
 """
 Explicit spaCy EntityRuler patterns for Indian legal documents.
 
-Labels used: CASE_CITATION, STATUTE_SECTION, STATUTE, COURT, CASE_NUMBER, DATE, PARTY, JUDGE, GPE
+Labels used: CITATION, CASE_CITATION, STATUTE_SECTION, STATUTE, COURT, CASE_NUMBER, DATE, PARTY, JUDGE, GPE
 
-Pattern format follows spaCy v3 EntityRuler token patterns. Regex entries use
-{"TEXT": {"REGEX": r"(?i)regex"}} to enable case-insensitive matching.
+Pattern format follows spaCy v3 EntityRuler token patterns. Single-token regex entries use
+{"TEXT": {"REGEX": r"(?i)regex"}} to enable case-insensitive matching; anything spanning
+several tokens is a token sequence (LOWER/SHAPE/IS_DIGIT...), since a token regex only
+ever sees one token's text. An id may appear on several entries (variants of one rule).
 Each pattern includes a stable id so ent.ent_id_ can be inspected for provenance.
 """
 
 from __future__ import annotations
 
+import itertools
+import re
+from typing import Dict, List, Tuple
+
+# spaCy tokens never contain whitespace, so a single-token REGEX with a mandatory space can
+# never fire; multi-word forms are written as token-attribute sequences instead.
+_YEAR = {"SHAPE": "dddd"}
+_NUM = {"IS_DIGIT": True}
+# the tokenizer splits off a trailing ")", so only the last subsection may be unclosed;
+# patterns follow _SECTION_NUM with an optional _CLOSE_PAREN to take it back
+_SECTION_NUM = {"TEXT": {"REGEX": r"^\d+[A-Za-z]?(?:\([0-9A-Za-z]+\))*(?:\([0-9A-Za-z]+)?$"}}
+_CLOSE_PAREN = {"ORTH": ")", "OP": "?"}
+_NAME = {"IS_ALPHA": True, "IS_LOWER": False}
+_HONBLE = {"LOWER": {"IN": ["hon'ble", "hon’ble", "honble"]}}
+_DAY = {"IS_DIGIT": True, "LENGTH": {"<=": 2}}
+_MONTHS = ["january", "february", "march", "april", "may", "june", "july", "august",
+           "september", "october", "november", "december"]
+# Token shapes of d{1,2}[./-]d{1,2}[./-]d{2,4} (spaCy shapes collapse runs longer than 4)
+_NUMERIC_DATE_SHAPES = sorted(
+    f"{d}{s1}{m}{s2}{y}"
+    for d, m, y, s1, s2 in itertools.product(("d", "dd"), ("d", "dd"), ("dd", "ddd", "dddd"), "./-", "./-")
+)
+_HC_BENCHES = ["sc", "hc", "bom", "del", "mad", "cal", "ker", "all", "pat", "ap", "mp", "raj",
+               "ori", "gau", "p&h", "ph", "hp", "j&k"]
+
+
+def _lower(phrase: str) -> List[dict]:
+    """Case-insensitive token sequence for a literal multi-word phrase."""
+    return [{"LOWER": word} for word in phrase.split()]
+
+
+def _case_numbers(pid: str, *prefixes: List[dict]) -> List[dict]:
+    """'<prefix> No. <n>' rules, with and without a trailing 'of <year>'."""
+    entries = []
+    for prefix in prefixes:
+        head = [*prefix, {"LOWER": {"IN": ["no", "no."]}}, {"ORTH": ".", "OP": "?"}, _NUM]
+        for pattern in (head, head + [{"LOWER": "of"}, _YEAR]):
+            entries.append({"label": "CASE_NUMBER", "pattern": pattern, "id": pid})
+    return entries
+
+
 patterns = [
     # -------------------- CITATION (bare) --------------------
-    {"label": "CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)^\d{4}\s+(?:SCC|AIR|SCR|CriLJ|INSC|SCC\s+Online)\s+\d+"}}], "id": "CITATION:bare"},
+    # Reporters without a dedicated CASE_CITATION rule (SCC/CriLJ/INSC have one)
+    {"label": "CITATION", "pattern": [_YEAR, {"LOWER": {"IN": ["air", "scr"]}}, _NUM], "id": "CITATION:bare"},
+    {"label": "CITATION", "pattern": [_YEAR, {"LOWER": "scc"}, {"LOWER": "online"}, _NUM], "id": "CITATION:bare"},
     # -------------------- CASE_CITATION --------------------
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\(\s*\d{4}\s*\)\s*\d+\s*SCC(?:\s*\(Cri\))?\s*\d+"}}], "id": "CASE_CITATION:scc_cri_opt"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\d{4}\s+SCC\s+Online\s+[A-Za-z0-9\-_]+"}}], "id": "CASE_CITATION:scc_online"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)AIR\s*\d{4}\s*(?:SC|HC|Bom|Del|Mad|Cal|Ker|All|Pat|AP|MP|Raj|Ori|Gau|P&H|PH|HP|J&K)\s*\d+"}}], "id": "CASE_CITATION:air_reporter"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\(\s*\d{4}\s*\)\s*\d+\s*SCR\s*\d+"}}], "id": "CASE_CITATION:scr"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\d{4}\s+CriLJ\s+\d+"}}], "id": "CASE_CITATION:crilj"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\d{4}\s+INSC\s+\d+"}}], "id": "CASE_CITATION:insc"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)(?:\(\s*\d{4}\s*\)\s*\d+\s*SCC|\d{4}\s*SCC\s*\d+)"}}], "id": "CASE_CITATION:scc_redundant"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSCC\s*Online\s*[A-Za-z0-9]+\b"}}], "id": "CASE_CITATION:scc_online_simple"},
+    {"label": "CASE_CITATION", "pattern": [{"ORTH": "("}, _YEAR, {"ORTH": ")"}, _NUM, {"LOWER": "scc"}, _NUM], "id": "CASE_CITATION:scc_cri_opt"},
+    {"label": "CASE_CITATION", "pattern": [{"ORTH": "("}, _YEAR, {"ORTH": ")"}, _NUM, {"LOWER": "scc"}, {"ORTH": "("}, {"LOWER": "cri"}, {"ORTH": ")"}, _NUM], "id": "CASE_CITATION:scc_cri_opt"},
+    {"label": "CASE_CITATION", "pattern": [_YEAR, {"LOWER": "scc"}, {"LOWER": "online"}, {"TEXT": {"REGEX": r"^[A-Za-z0-9\-_]+$"}}], "id": "CASE_CITATION:scc_online"},
+    {"label": "CASE_CITATION", "pattern": [{"LOWER": "air"}, _YEAR, {"LOWER": {"IN": _HC_BENCHES}}, _NUM], "id": "CASE_CITATION:air_reporter"},
+    {"label": "CASE_CITATION", "pattern": [{"ORTH": "("}, _YEAR, {"ORTH": ")"}, _NUM, {"LOWER": "scr"}, _NUM], "id": "CASE_CITATION:scr"},
+    {"label": "CASE_CITATION", "pattern": [_YEAR, {"LOWER": "crilj"}, _NUM], "id": "CASE_CITATION:crilj"},
+    {"label": "CASE_CITATION", "pattern": [_YEAR, {"LOWER": "insc"}, _NUM], "id": "CASE_CITATION:insc"},
+    {"label": "CASE_CITATION", "pattern": [{"ORTH": "("}, _YEAR, {"ORTH": ")"}, _NUM, {"LOWER": "scc"}], "id": "CASE_CITATION:scc_redundant"},
+    {"label": "CASE_CITATION", "pattern": [_YEAR, {"LOWER": "scc"}, _NUM], "id": "CASE_CITATION:scc_redundant"},
+    {"label": "CASE_CITATION", "pattern": [{"LOWER": "scc"}, {"LOWER": "online"}, {"TEXT": {"REGEX": r"^[A-Za-z0-9]+$"}}], "id": "CASE_CITATION:scc_online_simple"},
     # Example phrase (literal) pattern
     {"label": "CASE_CITATION", "pattern": "AIR 2005 SC 123", "id": "CASE_CITATION:air_example_phrase"},
 
     # Extra explicit forms
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\b\d{4}\s+SCC\s+Online\s+\w+\s+\d+\b"}}], "id": "CASE_CITATION:scc_online_variant"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\b(199[0-9]|20[0-9]{2})\s+CriLJ\s+\d+\b"}}], "id": "CASE_CITATION:crilj_variant"},
-    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"(?i)\b(197[0-9]|198[0-9]|199[0-9]|200[0-9]|201[0-9]|202[0-5])\s+SCR\s+\d+\b"}}], "id": "CASE_CITATION:scr_year_range"},
+    {"label": "CASE_CITATION", "pattern": [_YEAR, {"LOWER": "scc"}, {"LOWER": "online"}, {"TEXT": {"REGEX": r"^\w+$"}}, _NUM], "id": "CASE_CITATION:scc_online_variant"},
+    {"label": "CASE_CITATION", "pattern": [{"TEXT": {"REGEX": r"^(?:19[7-9]\d|20[01]\d|202[0-5])$"}}, {"LOWER": "scr"}, _NUM], "id": "CASE_CITATION:scr_year_range"},
 
     # -------------------- STATUTE_SECTION --------------------
     {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bS\.?\s*\d+(?:\([0-9A-Za-z]+\))*\b"}}], "id": "STATUTE_SECTION:s_dot"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": {"IN": ["s", "s."]}}, _SECTION_NUM, _CLOSE_PAREN], "id": "STATUTE_SECTION:s_dot"},
     {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSec\.?\s*\d+(?:\([0-9A-Za-z]+\))*\b"}}], "id": "STATUTE_SECTION:sec_dot"},
-    {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSection\s+[0-9]+(?:\([0-9A-Za-z]+\))*\b"}}], "id": "STATUTE_SECTION:section_num"},
-    {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSection\s+[ivxlcdm]+\b"}}], "id": "STATUTE_SECTION:section_roman"},
-    {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bArticle\s+[0-9A-Za-z]+\b"}}], "id": "STATUTE_SECTION:article"},
-    {"label": "STATUTE_SECTION", "pattern": [{"TEXT": {"REGEX": r"(?i)\bClause\s+[A-Za-z0-9()]+\b"}}], "id": "STATUTE_SECTION:clause"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": {"IN": ["sec", "sec."]}}, {"ORTH": ".", "OP": "?"}, _SECTION_NUM, _CLOSE_PAREN], "id": "STATUTE_SECTION:sec_dot"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": "section"}, _SECTION_NUM, _CLOSE_PAREN], "id": "STATUTE_SECTION:section_num"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": "section"}, {"TEXT": {"REGEX": r"(?i)^[ivxlcdm]+$"}}], "id": "STATUTE_SECTION:section_roman"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": "article"}, {"TEXT": {"REGEX": r"^[0-9A-Za-z]+$"}}], "id": "STATUTE_SECTION:article"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": "clause"}, {"TEXT": {"REGEX": r"^[A-Za-z0-9()]+$"}}], "id": "STATUTE_SECTION:clause"},
+    {"label": "STATUTE_SECTION", "pattern": [{"LOWER": "clause"}, {"ORTH": "("}, {"TEXT": {"REGEX": r"^[A-Za-z0-9]+$"}}, {"ORTH": ")"}], "id": "STATUTE_SECTION:clause"},
 
     # -------------------- STATUTE (acts and abbreviations) --------------------
     # IPC
@@ -52,41 +101,41 @@ patterns = [
     {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bC\.P\.C\.?\b"}}], "id": "STATUTE:cpc_regex_dotted"},
     # Evidence Act
     {"label": "STATUTE", "pattern": "Evidence Act", "id": "STATUTE:evidence_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bEvidence\s+Act\b"}}], "id": "STATUTE:evidence_regex"},
+    {"label": "STATUTE", "pattern": _lower("evidence act"), "id": "STATUTE:evidence_regex"},
     # Transfer of Property Act
     {"label": "STATUTE", "pattern": "Transfer of Property Act", "id": "STATUTE:topa_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bTransfer\s+of\s+Property\s+Act\b"}}], "id": "STATUTE:topa_regex"},
+    {"label": "STATUTE", "pattern": _lower("transfer of property act"), "id": "STATUTE:topa_regex"},
     # Registration Act
     {"label": "STATUTE", "pattern": "Registration Act", "id": "STATUTE:regact_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bRegistration\s+Act\b"}}], "id": "STATUTE:regact_regex"},
+    {"label": "STATUTE", "pattern": _lower("registration act"), "id": "STATUTE:regact_regex"},
     # Indian Stamp Act
     {"label": "STATUTE", "pattern": "Indian Stamp Act", "id": "STATUTE:stamp_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bStamp\s+Act\b"}}], "id": "STATUTE:stamp_regex"},
+    {"label": "STATUTE", "pattern": _lower("stamp act"), "id": "STATUTE:stamp_regex"},
     # Specific Relief Act
     {"label": "STATUTE", "pattern": "Specific Relief Act", "id": "STATUTE:sra_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSpecific\s+Relief\s+Act\b"}}], "id": "STATUTE:sra_regex"},
+    {"label": "STATUTE", "pattern": _lower("specific relief act"), "id": "STATUTE:sra_regex"},
     # Companies Act
     {"label": "STATUTE", "pattern": "Companies Act, 2013", "id": "STATUTE:companies_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bCompanies\s+Act\b"}}], "id": "STATUTE:companies_regex"},
+    {"label": "STATUTE", "pattern": _lower("companies act"), "id": "STATUTE:companies_regex"},
     # Contract Act
     {"label": "STATUTE", "pattern": "Contract Act, 1872", "id": "STATUTE:contract_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bContract\s+Act\b"}}], "id": "STATUTE:contract_regex"},
+    {"label": "STATUTE", "pattern": _lower("contract act"), "id": "STATUTE:contract_regex"},
     # Constitution of India
     {"label": "STATUTE", "pattern": "Constitution of India", "id": "STATUTE:constitution_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bConstitution\s+of\s+India\b"}}], "id": "STATUTE:constitution_regex"},
+    {"label": "STATUTE", "pattern": _lower("constitution of india"), "id": "STATUTE:constitution_regex"},
     # Information Technology Act
     {"label": "STATUTE", "pattern": "Information Technology Act, 2000", "id": "STATUTE:it_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bInformation\s+Technology\s+Act\b"}}], "id": "STATUTE:it_regex_long"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bIT\s+Act\b"}}], "id": "STATUTE:it_regex_short"},
+    {"label": "STATUTE", "pattern": _lower("information technology act"), "id": "STATUTE:it_regex_long"},
+    {"label": "STATUTE", "pattern": _lower("it act"), "id": "STATUTE:it_regex_short"},
     # GST Act
     {"label": "STATUTE", "pattern": "Central Goods and Services Tax Act, 2017", "id": "STATUTE:gst_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bGST\s+Act\b"}}], "id": "STATUTE:gst_regex"},
+    {"label": "STATUTE", "pattern": _lower("gst act"), "id": "STATUTE:gst_regex"},
     # Motor Vehicles Act
     {"label": "STATUTE", "pattern": "Motor Vehicles Act, 1988", "id": "STATUTE:mv_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bMotor\s+Vehicles\s+Act\b"}}], "id": "STATUTE:mv_regex"},
+    {"label": "STATUTE", "pattern": _lower("motor vehicles act"), "id": "STATUTE:mv_regex"},
     # Income Tax Act
     {"label": "STATUTE", "pattern": "Income Tax Act, 1961", "id": "STATUTE:itax_phrase"},
-    {"label": "STATUTE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bIncome\s+Tax\s+Act\b"}}], "id": "STATUTE:itax_regex"},
+    {"label": "STATUTE", "pattern": _lower("income tax act"), "id": "STATUTE:itax_regex"},
 
     # -------------------- COURT --------------------
     # Phrase patterns
@@ -113,23 +162,25 @@ patterns = [
     # Abbreviations
     {"label": "COURT", "pattern": [{"TEXT": {"REGEX": r"(?i)\b(DelHC|MadHC|BomHC|CalHC|KerHC|KarnHC|AllHC|PatHC|APHC|MPHC|RajHC|OriHC|GauHC|PnHHC|PHHC|J&KHC|HPHC)\b"}}], "id": "COURT:abbrev"},
     # Generic High Court names
-    {"label": "COURT", "pattern": [{"TEXT": {"REGEX": r"(?i)\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+High\s+Court\b"}}], "id": "COURT:generic_hc"},
+    {"label": "COURT", "pattern": [{"IS_TITLE": True, "OP": "+"}, {"LOWER": "high"}, {"LOWER": "court"}], "id": "COURT:generic_hc"},
 
     # -------------------- CASE_NUMBER --------------------
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bC\.?A\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:ca_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bS\.?L\.?P\.?\s*\(?C\)?\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:slp_c_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bCRP(?:\.PD\.)?\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:crp_pd_no"},
+    *_case_numbers("CASE_NUMBER:ca_no", [{"LOWER": {"IN": ["c.a.", "c.a", "ca"]}}]),
+    *_case_numbers("CASE_NUMBER:slp_c_no", [{"LOWER": {"IN": ["slp", "s.l.p.", "s.l.p"]}}, {"ORTH": "("}, {"LOWER": "c"}, {"ORTH": ")"}], [{"LOWER": "s.l.p.(c"}, {"ORTH": ")"}]),
+    *_case_numbers("CASE_NUMBER:crp_pd_no", [{"LOWER": {"IN": ["crp", "crp.pd", "crp.pd."]}}, {"ORTH": ".", "OP": "?"}]),
     {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bO\.?S\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:os_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bI\.?A\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:ia_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bW\.?P\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:wp_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bO\.?A\.?\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:oa_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bSuit\s*No\.?\s*\d+(?:\s*of\s*\d{4})?\b"}}], "id": "CASE_NUMBER:suit_no"},
-    {"label": "CASE_NUMBER", "pattern": [{"TEXT": {"REGEX": r"(?i)\bI\.?A\.?\s*No\.?\s*\d+\b"}}], "id": "CASE_NUMBER:ia_no_simple"},
+    *_case_numbers("CASE_NUMBER:os_no", [{"LOWER": {"IN": ["o.s.", "o.s", "os"]}}]),
+    *_case_numbers("CASE_NUMBER:ia_no", [{"LOWER": {"IN": ["i.a.", "i.a", "ia"]}}]),
+    *_case_numbers("CASE_NUMBER:wp_no", [{"LOWER": {"IN": ["w.p.", "w.p", "wp"]}}]),
+    *_case_numbers("CASE_NUMBER:oa_no", [{"LOWER": {"IN": ["o.a.", "o.a", "oa"]}}]),
+    *_case_numbers("CASE_NUMBER:suit_no", [{"LOWER": "suit"}]),
 
     # -------------------- DATE --------------------
-    {"label": "DATE", "pattern": [{"TEXT": {"REGEX": r"\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b"}}], "id": "DATE:dmy_numeric"},
-    {"label": "DATE", "pattern": [{"TEXT": {"REGEX": r"(?i)\b\d{1,2}\s+(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{4}\b"}}], "id": "DATE:dd_month_yyyy"},
-    {"label": "DATE", "pattern": [{"TEXT": {"REGEX": r"(?i)\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b"}}], "id": "DATE:month_dd_yyyy"},
+    {"label": "DATE", "pattern": [{"SHAPE": {"IN": _NUMERIC_DATE_SHAPES}}], "id": "DATE:dmy_numeric"},
+    # 1-1-99 / 1/1/1999 are split by the tokenizer's infix rules
+    {"label": "DATE", "pattern": [_DAY, {"ORTH": {"IN": ["-", "/"]}}, _DAY, {"ORTH": {"IN": ["-", "/"]}}, {"IS_DIGIT": True, "LENGTH": {">=": 2, "<=": 4}}], "id": "DATE:dmy_numeric"},
+    {"label": "DATE", "pattern": [_DAY, {"LOWER": {"IN": _MONTHS}}, _YEAR], "id": "DATE:dd_month_yyyy"},
+    {"label": "DATE", "pattern": [{"LOWER": {"IN": _MONTHS}}, _DAY, {"ORTH": ",", "OP": "?"}, _YEAR], "id": "DATE:month_dd_yyyy"},
 
     # -------------------- PARTY --------------------
     # Core role phrases
@@ -143,20 +194,165 @@ patterns = [
     {"label": "PARTY", "pattern": "Through LRs.", "id": "PARTY:through_lrs_dot"},
     {"label": "PARTY", "pattern": "Through LRS", "id": "PARTY:through_lrs_caps"},
     # Party line regex (case title parts)
-    {"label": "PARTY", "pattern": [{"TEXT": {"REGEX": r"(?i)\b[A-Z][A-Za-z0-9\-\s&\.']{2,}\b(?:\s+\.\.\.)?\s+(?:APPELLANT|RESPONDENT|PETITIONER|DEFENDANT)\b"}}], "id": "PARTY:title_line"},
+    {"label": "PARTY", "pattern": [{"IS_UPPER": True, "OP": "+"}, {"ORTH": "...", "OP": "?"}, {"LOWER": {"IN": ["appellant", "respondent", "petitioner", "defendant"]}}], "id": "PARTY:title_line"},
 
     # -------------------- JUDGE --------------------
-    {"label": "JUDGE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bHon'?ble\s+Justice\s+[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)?\b"}}], "id": "JUDGE:honble_justice"},
-    {"label": "JUDGE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bJustice\s+[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+)?\b"}}], "id": "JUDGE:justice"},
+    {"label": "JUDGE", "pattern": [_HONBLE, {"LOWER": "justice"}, _NAME, {**_NAME, "OP": "?"}], "id": "JUDGE:honble_justice"},
+    {"label": "JUDGE", "pattern": [{"LOWER": "justice"}, _NAME, {**_NAME, "OP": "?"}], "id": "JUDGE:justice"},
     # Signatures / uppercase with trailing J.
-    {"label": "JUDGE", "pattern": [{"TEXT": {"REGEX": r"(?i)\b(?:HON'?BLE\s+)?[A-Z][A-Z\s]+J\.\b"}}], "id": "JUDGE:signature_caps_j"},
-    {"label": "JUDGE", "pattern": [{"TEXT": {"REGEX": r"(?i)\[?[A-Z][A-Za-z\s]+J\.\]?"}}], "id": "JUDGE:bracket_name_j"},
+    {"label": "JUDGE", "pattern": [{**_HONBLE, "OP": "?"}, {"IS_UPPER": True, "OP": "+"}, {"ORTH": "J."}], "id": "JUDGE:signature_caps_j"},
+    {"label": "JUDGE", "pattern": [{"ORTH": "[", "OP": "?"}, {"TEXT": {"REGEX": r"^[A-Z][A-Za-z.]*$"}, "OP": "+"}, {"ORTH": "J."}, {"ORTH": "]", "OP": "?"}], "id": "JUDGE:bracket_name_j"},
     {"label": "JUDGE", "pattern": "Chief Justice of India", "id": "JUDGE:cji"},
     {"label": "JUDGE", "pattern": "Hon'ble Judge", "id": "JUDGE:honble_judge"},
     {"label": "JUDGE", "pattern": "Honble", "id": "JUDGE:honble_plain"},
 
     # -------------------- GPE --------------------
-    {"label": "GPE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bState\s+of\s+[A-Z][a-zA-Z ]+\b"}}], "id": "GPE:state_of"},
-    {"label": "GPE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bUnion\s+of\s+India\b"}}], "id": "GPE:union_of_india"},
-    {"label": "GPE", "pattern": [{"TEXT": {"REGEX": r"(?i)\bGovernment\s+of\s+[A-Z][a-zA-Z ]+\b"}}], "id": "GPE:govt_of"},
+    {"label": "GPE", "pattern": [{"LOWER": "state"}, {"LOWER": "of"}, {"IS_TITLE": True, "OP": "+"}], "id": "GPE:state_of"},
+    {"label": "GPE", "pattern": _lower("union of india"), "id": "GPE:union_of_india"},
+    {"label": "GPE", "pattern": [{"LOWER": "government"}, {"LOWER": "of"}, {"IS_TITLE": True, "OP": "+"}], "id": "GPE:govt_of"},
 ]
+
+
+# Literal phrases go to a tokenizer-only PhraseMatcher (see add_phrase_matcher); token
+# patterns stay on the EntityRuler
+STRING_PATTERNS = [entry for entry in patterns if isinstance(entry["pattern"], str)]
+REGEX_PATTERNS = [entry for entry in patterns if not isinstance(entry["pattern"], str)]
+
+
+def _single_regex(entry: dict) -> str | None:
+    """Return the regex of a one-token ``{"TEXT": {"REGEX": ...}}`` pattern, else None."""
+    pat = entry["pattern"]
+    if isinstance(pat, list) and len(pat) == 1 and list(pat[0]) == ["TEXT"]:
+        cond = pat[0]["TEXT"]
+        if isinstance(cond, dict) and list(cond) == ["REGEX"]:
+            return cond["REGEX"]
+    return None
+
+
+def token_regexes() -> List[Tuple[str, str, str]]:
+    """Return ``(id, label, regex)`` for every single-token regex pattern, in file order."""
+    found = []
+    for entry in patterns:
+        regex = _single_regex(entry)
+        if regex is not None:
+            found.append((entry["id"], entry["label"], regex))
+    return found
+
+
+def token_sequence_patterns() -> List[dict]:
+    """Return the token patterns that are not a single-token regex."""
+    return [entry for entry in REGEX_PATTERNS if _single_regex(entry) is None]
+
+
+def _scoped(regex: str) -> str:
+    # Turn a leading global (?i) into a scoped group so flags do not leak across alternatives
+    if regex.startswith("(?i)"):
+        return f"(?i:{regex[4:]})"
+    return f"(?:{regex})"
+
+
+# label -> (compiled union, group name -> original pattern id)
+_UNIONS: Dict[str, Tuple[re.Pattern, Dict[str, str]]] = {}
+# pattern ids of the input -> merged pattern list, so unions are built once per process
+_MERGED: Dict[Tuple[str, ...], List[dict]] = {}
+
+
+def build_patterns(entries: List[dict] | None = None) -> List[dict]:
+    """Return ``entries`` (default ``patterns``) with each label's token regexes merged into one alternation.
+
+    The matcher then tests one regex per label against each token instead of one per
+    pattern. Other patterns pass through unchanged. The merged entries carry the id
+    ``<LABEL>:union``; use :func:`rule_id` to recover the original pattern id of a hit.
+    """
+    entries = patterns if entries is None else entries
+    key = tuple(entry["id"] for entry in entries)
+    if key in _MERGED:
+        return list(_MERGED[key])
+
+    merged: List[dict] = []
+    buckets: Dict[str, List[Tuple[str, str]]] = {}
+    for entry in entries:
+        regex = _single_regex(entry)
+        if regex is None:
+            merged.append(entry)
+            continue
+        if entry["label"] not in buckets:
+            buckets[entry["label"]] = []
+            # Keep the union at the position of the label's first regex
+            merged.append({"label": entry["label"], "pattern": None, "id": f"{entry['label']}:union"})
+        buckets[entry["label"]].append((entry["id"], regex))
+
+    for entry in merged:
+        if entry["pattern"] is not None:
+            continue
+        label = entry["label"]
+        groups = {f"g{i}": pid for i, (pid, _) in enumerate(buckets[label])}
+        union = "|".join(f"(?P<g{i}>{_scoped(regex)})" for i, (_, regex) in enumerate(buckets[label]))
+        _UNIONS[label] = (re.compile(union), groups)
+        entry["pattern"] = [{"TEXT": {"REGEX": union}}]
+    _MERGED[key] = merged
+    return list(merged)
+
+
+def rule_id(label: str, ent_id: str, text: str) -> str:
+    """Map a ``<LABEL>:union`` hit back to the id of the pattern that matched ``text``."""
+    if not ent_id.endswith(":union") or label not in _UNIONS:
+        return ent_id
+    union, groups = _UNIONS[label]
+    # Span text joins tokens with whitespace; the token-level match ran on a single token
+    for token in text.split():
+        m = union.search(token)
+        if m and m.lastgroup:
+            return groups[m.lastgroup]
+    return ent_id
+
+
+def add_phrase_matcher(nlp, before: str | None = None):
+    """Add a ``legal_phrases`` component matching ``STRING_PATTERNS`` with one PhraseMatcher.
+
+    Pattern docs are built with ``nlp.make_doc`` (tokenizer only), whereas
+    ``EntityRuler.add_patterns`` runs every phrase through the pipeline components
+    ahead of the ruler (the transformer, for ``en_legal_ner_trf``). Matching is on
+    ORTH like the ruler's default and spans keep the pattern id as ``ent_id_``.
+
+    Add it after the rule components: their hits (entities with an ``ent_id_``) and the
+    phrase matches are resolved together, longest first, as one EntityRuler holding
+    every pattern would; other existing entities are never overwritten.
+    """
+    from spacy.language import Language
+
+    if not Language.has_factory("legal_phrases"):
+        Language.factory("legal_phrases", func=lambda nlp, name: _LegalPhrases(nlp))
+    if before and before in nlp.pipe_names:
+        return nlp.add_pipe("legal_phrases", before=before)
+    return nlp.add_pipe("legal_phrases")
+
+
+class _LegalPhrases:
+    def __init__(self, nlp) -> None:
+        from spacy.matcher import PhraseMatcher
+
+        self.matcher = PhraseMatcher(nlp.vocab)
+        self.labels: Dict[str, str] = {}
+        for entry in STRING_PATTERNS:
+            self.labels[entry["id"]] = entry["label"]
+            self.matcher.add(entry["id"], [nlp.make_doc(entry["pattern"])])
+
+    def __call__(self, doc):
+        from spacy.tokens import Span
+        from app.span_filter import filter_spans
+
+        strings = doc.vocab.strings
+        spans = []
+        for match_id, start, end in self.matcher(doc):
+            pid = strings[match_id]
+            spans.append(Span(doc, start, end, label=self.labels[pid], span_id=pid))
+        if spans:
+            # Rule hits compete with the phrases (longest wins); anything else is kept
+            keep, rule_hits = [], []
+            for ent in doc.ents:
+                (rule_hits if ent.ent_id_ else keep).append(ent)
+            taken = {i for ent in keep for i in range(ent.start, ent.end)}
+            new = [sp for sp in filter_spans(rule_hits + spans) if taken.isdisjoint(range(sp.start, sp.end))]
+            doc.ents = keep + new
+        return doc
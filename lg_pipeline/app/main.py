@@ -1,26 +1,104 @@
 from __future__ import annotations
 import argparse
 import json
-from typing import Any, Dict
+import os
+import sys
+from typing import Any, Dict, Tuple
 
-from .graph import build_graph, build_json_graph, build_embed_graph, build_chroma_graph, build_ner_graph, build_neo4j_graph, build_retrieve_graph
+try:
+    import orjson
+
+    def _emit(obj: Any) -> None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+        out = getattr(sys.stdout, "buffer", None)
+        # orjson has no ensure_ascii: for non-ASCII (e.g. Devanagari party names) or a
+        # text-only stdout fall back to json's \uXXXX escapes so consoles don't mojibake
+        if out is None or not data.isascii():
+            sys.stdout.write(json.dumps(obj, indent=2) + "\n")
+            return
+        # orjson already returns UTF-8 bytes; flush pending text so ordering is kept
+        sys.stdout.flush()
+        out.write(data)
+        out.flush()
+except ImportError:  # pragma: no cover - optional dependency
+    def _emit(obj: Any) -> None:
+        sys.stdout.write(json.dumps(obj, indent=2) + "\n")
+
+# mode -> graph builder in .graph; resolved only after argument parsing so --help and
+# argument errors return without importing LangGraph and the node dependencies
+_BUILDERS = {
+    "docx": "build_graph",
+    "json": "build_json_graph",
+    "embed": "build_embed_graph",
+    "chroma": "build_chroma_graph",
+    "ner": "build_ner_graph",
+    "neo4j": "build_neo4j_graph",
+    "retrieve": "build_retrieve_graph",
+}
+
+_FILE_MODES = ("docx", "json", "embed", "chroma", "ner", "neo4j")
+
+_NEO4J_KEYS = ("neo4j_uri", "neo4j_user", "neo4j_password", "neo4j_database")
+
+# mode -> argparse dests copied into the initial graph state under the same name
+MODE_KEYS: Dict[str, Tuple[str, ...]] = {
+    "embed": ("model_path", "batch_size", "device", "embed_dtype", "embed_store", "embed_store_dtype", "embed_compile", "embed_workers"),
+    "chroma": ("chroma_path", "collection", "batch_size"),
+    "neo4j": _NEO4J_KEYS + ("batch_size",),
+    "retrieve": (
+        "query",
+        # NER for query
+        "framework", "spacy_model", "ner_env",
+        # Embedding/chroma
+        "model_path", "device", "top_k", "chroma_path", "collection",
+        # KG
+        "kg_limit",
+    ) + _NEO4J_KEYS + ("strict_match",),
+    "ner": ("framework", "spacy_model", "ner_model_path", "ner_env", "batch_size", "device", "aggregation"),
+}
+
+# mode -> result keys echoed in the printed summary (besides output_path)
+SUMMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "chroma": ("upserted", "chroma_path", "collection"),
+    "neo4j": ("ingested", "neo4j_uri", "neo4j_user"),
+    "retrieve": (
+        # Which sources were available/used
+        "chroma_available", "kg_available", "chroma_error", "kg_error",
+        # KG key diagnostics
+        "kg_requested_keys", "kg_matched_keys",
+        "source_counts", "final_ids", "provenance",
+    ),
+}
+
+# mode -> result keys echoed only when truthy
+SUMMARY_TRUTHY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "ner": ("ner_env",),
+}
 
 
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="DOCX/JSON -> chunks.jsonl via LangGraph + LangChain")
     p.add_argument("--input", required=False, default=None, help="Path to input file (required for docx/json/embed/chroma/ner/neo4j modes)")
     p.add_argument("--output", required=False, default=None, help="Path to output JSONL (optional)")
-    p.add_argument("--mode", choices=["docx", "json", "embed", "chroma", "ner", "neo4j", "retrieve"], default="docx", help="Processing mode")
+    p.add_argument("--mode", choices=list(_BUILDERS), default="docx", help="Processing mode")
+    p.add_argument("--threads", type=int, default=None, help="Cap OpenMP/MKL/torch intra-op threads (default: library defaults)")
     # Chroma options
     p.add_argument("--chroma-path", default=None, help="ChromaDB persistent path (defaults to .chroma)")
     p.add_argument("--collection", default="default", help="ChromaDB collection name")
     p.add_argument("--chunk-size", type=int, default=1200)
     p.add_argument("--chunk-overlap", type=int, default=200)
+    p.add_argument("--split-workers", type=int, default=1, help="Processes splitting JSON cases in parallel (json mode)")
+    p.add_argument("--merge-small-chunks", action="store_true", help="Join runs of short adjacent chunks up to 1.15x --chunk-size (docx/json modes)")
     p.add_argument("--model-path", default=None, help="Local HF model directory for embeddings (embed mode)")
     p.add_argument("--batch-size", type=int, default=32, help="Batch size for embeddings (embed mode)")
     p.add_argument("--device", default=None, help="torch device, e.g. cuda or cpu (embed mode)")
+    p.add_argument("--embed-dtype", choices=["fp32", "fp16", "bf16", "int8"], default="fp32", help="Embedding inference precision; int8 is dynamic quantization on CPU (embed mode)")
+    p.add_argument("--embed-compile", action="store_true", help="torch.compile the embedding model; pays off only on large inputs (embed mode)")
+    p.add_argument("--embed-workers", type=int, default=0, help="DataLoader workers padding batches ahead of the model (embed mode)")
+    p.add_argument("--embed-store", choices=["npy", "jsonl"], default="npy", help="Write vectors to a side-car .npy next to the JSONL, or inline as JSON floats (embed mode)")
+    p.add_argument("--embed-store-dtype", choices=["fp32", "fp16", "int8"], default="fp32", help="Precision of the .npy side-car; int8 stores a per-vector scale on each JSONL line (embed mode)")
     # Retrieve options
-    p.add_argument("--query", default=None, help="User query to retrieve relevant chunks")
+    p.add_argument("--query", action="append", default=None, help="User query to retrieve relevant chunks; repeat to retrieve for several queries in one batch")
     p.add_argument("--top-k", type=int, default=10, help="Top K chunks to return")
     p.add_argument("--kg-limit", type=int, default=25, help="Max KG hits to consider")
     # Allow --strict-match / --no-strict-match
@@ -39,27 +117,25 @@ def parse_args() -> argparse.Namespace:
     return p.parse_args()
 
 
+def _limit_threads(n: int) -> None:
+    """Cap BLAS/OpenMP pools; must run before numpy/torch are imported to take effect."""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ.setdefault(var, str(n))
+    try:
+        import torch
+    except ImportError:  # pragma: no cover - torch is only needed for embed/retrieve
+        return
+    torch.set_num_threads(n)
+
+
 def main() -> None:
     args = parse_args()
-
-    if args.mode == "docx":
-        app = build_graph()
-    elif args.mode == "json":
-        app = build_json_graph()
-    elif args.mode == "embed":
-        app = build_embed_graph()
-    elif args.mode == "chroma":
-        app = build_chroma_graph()
-    elif args.mode == "neo4j":
-        app = build_neo4j_graph()
-    elif args.mode == "retrieve":
-        app = build_retrieve_graph()
-    else:
-        app = build_ner_graph()
+    if args.threads:
+        _limit_threads(args.threads)
 
     state: Dict[str, Any] = {"output_path": args.output}
     # Only modes that operate on a file need input_path
-    if args.mode in ("docx", "json", "embed", "chroma", "ner", "neo4j"):
+    if args.mode in _FILE_MODES:
         if not args.input:
             raise SystemExit("--input is required for this mode")
         state["input_path"] = args.input
@@ -68,110 +144,25 @@ def main() -> None:
             "chunk_size": args.chunk_size,
             "chunk_overlap": args.chunk_overlap,
             "separators": None,
+            "merge_small_chunks": args.merge_small_chunks,
+            "workers": args.split_workers,
         }
-    if args.mode == "embed":
-        state.update({
-            "model_path": args.model_path,
-            "batch_size": args.batch_size,
-            "device": args.device,
-        })
-    if args.mode == "chroma":
-        state.update({
-            "chroma_path": args.chroma_path,
-            "collection": args.collection,
-            "batch_size": args.batch_size,
-        })
-    if args.mode == "neo4j":
-        state.update({
-            "neo4j_uri": args.neo4j_uri,
-            "neo4j_user": args.neo4j_user,
-            "neo4j_password": args.neo4j_password,
-            "neo4j_database": args.neo4j_database,
-            "batch_size": args.batch_size,
-        })
-    if args.mode == "retrieve":
-        state.update({
-            "query": args.query,
-            "output_path": args.output,
-            # NER for query
-            "framework": args.framework,
-            "spacy_model": args.spacy_model,
-            "ner_env": args.ner_env,
-            # Embedding/chroma
-            "model_path": args.model_path,
-            "device": args.device,
-            "top_k": args.top_k,
-            "chroma_path": args.chroma_path,
-            "collection": args.collection,
-            # KG
-            "kg_limit": args.kg_limit,
-            "neo4j_uri": args.neo4j_uri,
-            "neo4j_user": args.neo4j_user,
-            "neo4j_password": args.neo4j_password,
-            "neo4j_database": args.neo4j_database,
-            "strict_match": args.strict_match,
-        })
-    if args.mode == "ner":
-        state.update({
-            "framework": args.framework,
-            "spacy_model": args.spacy_model,
-            "ner_model_path": args.ner_model_path,
-            "ner_env": args.ner_env,
-            "batch_size": args.batch_size,
-            "device": args.device,
-            "aggregation": args.aggregation,
-        })
+    state.update({k: getattr(args, k) for k in MODE_KEYS.get(args.mode, ())})
+
+    from . import graph
 
+    app = getattr(graph, _BUILDERS[args.mode])()
     result = app.invoke(state)
 
     # Print a concise JSON summary depending on mode
     summary: Dict[str, Any] = {}
     if result.get("output_path"):
         summary["output_path"] = result.get("output_path")
-    if args.mode == "chroma":
-        # Include upsert stats for Chroma operations
-        if "upserted" in result:
-            summary["upserted"] = result["upserted"]
-        if "chroma_path" in result:
-            summary["chroma_path"] = result["chroma_path"]
-        if "collection" in result:
-            summary["collection"] = result["collection"]
-    if args.mode == "ner":
-        # Include NER output path explicitly
-        if result.get("output_path"):
-            summary["output_path"] = result["output_path"]
-        if result.get("ner_env"):
-            summary["ner_env"] = result["ner_env"]
-    if args.mode == "neo4j":
-        if "ingested" in result:
-            summary["ingested"] = result["ingested"]
-        if "neo4j_uri" in result:
-            summary["neo4j_uri"] = result["neo4j_uri"]
-        if "neo4j_user" in result:
-            summary["neo4j_user"] = result["neo4j_user"]
-    if args.mode == "retrieve":
-        if result.get("output_path"):
-            summary["output_path"] = result["output_path"]
-        # Include which sources were available/used
-        for k in ("chroma_available", "kg_available", "chroma_error", "kg_error"):
-            if k in result:
-                summary[k] = result[k]
-        # Include KG key diagnostics if available
-        if "kg_requested_keys" in result:
-            summary["kg_requested_keys"] = result["kg_requested_keys"]
-        if "kg_matched_keys" in result:
-            summary["kg_matched_keys"] = result["kg_matched_keys"]
-        if "source_counts" in result:
-            summary["source_counts"] = result["source_counts"]
-        if "final_ids" in result:
-            summary["final_ids"] = result["final_ids"]
-        if "provenance" in result:
-            # Only keep provenance for selected ids to keep output small
-            sel = result.get("final_ids") or []
-            prov = result.get("provenance") or {}
-            summary["provenance"] = {i: prov.get(i, []) for i in sel}
-
-    print(json.dumps(summary or {"status": "ok"}, indent=2))
+    # merge_ids_node already limits retrieve provenance to the selected ids
+    summary.update({k: result[k] for k in SUMMARY_KEYS.get(args.mode, ()) if k in result})
+    summary.update({k: result[k] for k in SUMMARY_TRUTHY_KEYS.get(args.mode, ()) if result.get(k)})
+
+    _emit(summary or {"status": "ok"})
 
 
 if __name__ == "__main__":
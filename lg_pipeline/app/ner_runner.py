@@ -1,288 +1,477 @@
 from __future__ import annotations
 import argparse
+import bisect
+import functools
+import hashlib
+import io
+import itertools
 import json
 import os
-from typing import List, Dict, Any
+import re
+import sys
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List
 import logging
 
+try:
+    import orjson
 
-def parse_args() -> argparse.Namespace:
+    _loads = orjson.loads
+
+    def _dump_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:  # pragma: no cover - optional dependency (may be missing in ner_env)
+    _loads = json.loads
+
+    def _dump_line(obj: Any) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+UNUSED_SPACY_PIPES = ["tagger", "morphologizer", "parser", "senter", "attribute_ruler", "lemmatizer"]
+
+# Label part of the "LABEL:rule" ids set on legal pattern hits
+_RULER_LABELS = frozenset({"CITATION", "CASE_CITATION", "STATUTE_SECTION", "STATUTE", "COURT", "CASE_NUMBER", "DATE", "PARTY", "JUDGE", "GPE"})
+
+# Abbrev -> full name + label
+GAZETTEER: Dict[str, Dict[str, str]] = {
+    "ipc": {"name": "Indian Penal Code, 1860", "label": "STATUTE"},
+    "crpc": {"name": "Code of Criminal Procedure, 1973", "label": "STATUTE"},
+    "cpc": {"name": "Code of Civil Procedure, 1908", "label": "STATUTE"},
+    "sc": {"name": "Supreme Court of India", "label": "COURT"},
+    "hc": {"name": "High Court", "label": "COURT"},
+}
+# Whole-word scan over the raw text; no second tokenization of each record
+_GAZ_RE = re.compile(r"\b(?:" + "|".join(GAZETTEER) + r")\b", re.IGNORECASE)
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield JSONL records one at a time so the corpus is never held in memory."""
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            yield _loads(line)
+
+
+STATUTE_CACHE_DIR = os.environ.get("LG_STATUTE_CACHE", os.path.join(tempfile.gettempdir(), "lg_statute_vecs"))
+
+
+def _statute_cache_path(model_path: str, names: List[str], precision: str) -> str:
+    """Cache file for the statute name vectors of one model build, name list and precision."""
+    model_path = os.path.abspath(model_path)
+    try:
+        stamp = str(os.path.getmtime(os.path.join(model_path, "config.json")))
+    except OSError:
+        stamp = ""
+    key = "\0".join([model_path, stamp, precision, *names]).encode("utf-8")
+    return os.path.join(STATUTE_CACHE_DIR, f"statute_vecs.{hashlib.sha1(key).hexdigest()[:16]}.npy")
+
+
+class _Taken:
+    """Disjoint character intervals kept sorted, so an overlap test is one bisect."""
+
+    def __init__(self) -> None:
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+
+    def overlaps(self, start: int, end: int) -> bool:
+        # First interval ending after ``start``; disjoint + sorted means only it can overlap
+        i = bisect.bisect_right(self.ends, start)
+        return i < len(self.starts) and self.starts[i] < end
+
+    def add(self, start: int, end: int) -> None:
+        i = bisect.bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+
+def parse_args(argv: List[str] | None = None) -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Run NER over JSONL chunks using a local HF model (executed inside ner_env)")
-    p.add_argument("--input", required=True, help="Path to input chunks JSONL: {text, metadata}")
-    p.add_argument("--output", required=True, help="Path to output NER JSONL: {text, metadata, entities[]}")
+    p.add_argument("--input", default=None, help="Path to input chunks JSONL: {text, metadata}")
+    p.add_argument("--output", default=None, help="Path to output NER JSONL: {text, metadata, entities[]}")
+    p.add_argument("--server", action="store_true", help="Serve one JSONL record per stdin line with one NER line on stdout, keeping models loaded (replaces --input/--output)")
     # Framework selection
     p.add_argument("--framework", default="spacy", choices=["spacy", "transformers"], help="NER framework to use")
     # spaCy options
     p.add_argument("--spacy-model", default="en_legal_ner_trf", help="spaCy package/model name installed in env (e.g., en_legal_ner_trf)")
+    p.add_argument("--spacy-batch", type=int, default=int(os.getenv("LG_SPACY_BATCH", "64")), help="Records per nlp.pipe batch (spaCy only)")
+    p.add_argument("--spacy-nproc", type=int, default=int(os.getenv("LG_SPACY_NPROC", "1")), help="nlp.pipe worker processes, -1 for all CPUs; forced to 1 when the transformer is on GPU (spaCy only)")
+    p.add_argument("--regex-engine", default="ruler", choices=["ruler", "hyperscan"], help="Legal regex patterns via EntityRuler (per token) or one Hyperscan scan per document (spaCy only)")
     # Transformers options
     p.add_argument("--model-path", default=None, help="Local HF model directory (contains config.json) for transformers framework")
     p.add_argument("--batch-size", type=int, default=16, help="Batch size for pipeline")
+    p.add_argument("--num-workers", type=int, default=0, help="DataLoader workers tokenizing ahead of the model (transformers only)")
     p.add_argument("--device", default="cpu", help="torch device: cpu|cuda|cuda:0 ... (transformers only)")
     p.add_argument("--aggregation", default="simple", choices=["simple", "none"], help="Aggregation strategy for token-classification (transformers)")
     # Optional embedding model for fallback similarity (spaCy mode only)
     p.add_argument("--embed-model-path", default=None, help="Local HF embedding model directory for fallback statute matching (optional)")
-    return p.parse_args()
-
+    p.add_argument("--embed-compile", action="store_true", help="torch.compile the fallback encoder; pays off only on large inputs (spaCy only)")
+    return p.parse_args(argv)
 
-def main() -> None:
-    args = parse_args()
 
-    if not os.path.exists(args.input):
-        raise FileNotFoundError(f"Input not found: {args.input}")
-    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+log = logging.getLogger("nlp")
 
-    # Load records
-    records: List[Dict[str, Any]] = []
-    with open(args.input, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            records.append(json.loads(line))
+STATUTE_NAMES = (
+    "Indian Penal Code, 1860",
+    "Code of Criminal Procedure, 1973",
+    "Code of Civil Procedure, 1908",
+    "Indian Evidence Act, 1872",
+    "Information Technology Act, 2000",
+    "Constitution of India",
+)
+STATUTE_LABELS = {name: "STATUTE" for name in STATUTE_NAMES}
 
-    if args.framework == "spacy":
-        import spacy
-        from spacy.pipeline import EntityRuler
-        from spacy.matcher import PhraseMatcher
-        from spacy.tokens import Span
-        from app.legal_normalizer import normalize_unicode, normalize_sections, normalize_legal_entity
-        from app.legal_patterns import patterns as LEGAL_PATTERNS
 
-        # Load spaCy model
-        nlp = spacy.load(args.spacy_model)
+# Model loads below are memoized per argument tuple so repeated main() calls in one
+# process (a daemon runner, tests) share weights instead of reloading them
 
-    # Configure logging for debug visibility
-        logging.basicConfig(level=logging.DEBUG)
-        log = logging.getLogger("nlp")
+@functools.lru_cache(maxsize=2)
+def _build_spacy_pipeline(spacy_model: str, regex_engine: str):
+    """Load ``spacy_model`` with the legal phrase/regex rulers and the ruler_logger."""
+    import spacy
+    from spacy.language import Language
+    from spacy.pipeline import EntityRuler
+    from spacy.tokens import Doc, Span
+    from app.legal_patterns import REGEX_PATTERNS, add_phrase_matcher, build_patterns, rule_id, token_sequence_patterns
 
-        # ---------------- EntityRuler augmentation ----------------
-        # Insert EntityRuler with explicit legal patterns BEFORE NER
-        try:
-            ruler: EntityRuler = nlp.add_pipe("entity_ruler", before="ner")  # type: ignore
-        except Exception:
-            ruler = nlp.add_pipe("entity_ruler")  # type: ignore
-        ruler.add_patterns(LEGAL_PATTERNS)
+    # Load spaCy model without the components entity extraction never reads (POS, parse,
+    # lemmas, sentences); transformer/tok2vec and ner stay since ner listens to them
+    nlp = spacy.load(spacy_model, exclude=UNUSED_SPACY_PIPES)
 
-        # Span extension for provenance
-        if not Span.has_extension("source"):
-            Span.set_extension("source", default=None)
+    # ---------------- EntityRuler augmentation ----------------
+    # Regex/token EntityRuler, then the literal phrases (tokenizer-only PhraseMatcher), all
+    # BEFORE NER; the phrase component resolves its matches against the rule hits so the
+    # longer span wins either way, as in a single ruler
+    try:
+        ruler: EntityRuler = nlp.add_pipe("entity_ruler", before="ner")  # type: ignore
+    except Exception:
+        ruler = nlp.add_pipe("entity_ruler")  # type: ignore
+    if regex_engine == "hyperscan":
+        # All single-token regexes run as one Hyperscan pass over the doc
+        from app.hyperscan_entities import add_hyperscan_ruler
+        ruler.add_patterns(token_sequence_patterns())
+        add_hyperscan_ruler(nlp, before="ner")
+    else:
+        # Token regexes are merged per label so each token is tested once per label
+        ruler.add_patterns(build_patterns(REGEX_PATTERNS))
+    add_phrase_matcher(nlp, before="ner")
 
-        # Logger component to mark and log EntityRuler hits
-        from spacy.language import Language
+    # Span extension for provenance
+    if not Span.has_extension("source"):
+        Span.set_extension("source", default=None)
+    # Register a doc extension for counting ruler hits (idempotent)
+    if not Doc.has_extension("ruler_hits"):
+        Doc.set_extension("ruler_hits", default=0)
 
+    # Logger component to mark and log EntityRuler hits
+    if not Language.has_factory("ruler_logger"):
         @Language.component("ruler_logger")
         def ruler_logger_component(doc):
+            log_hits = log.isEnabledFor(logging.INFO)
             hit_cnt = 0
             for ent in doc.ents:
-                if ent.ent_id_ and ent.ent_id_.startswith((
-                    "CASE_CITATION:", "STATUTE_SECTION:", "STATUTE:", "COURT:", "CASE_NUMBER:", "DATE:", "PARTY:", "JUDGE:", "GPE:"
-                )):
+                eid = ent.ent_id_
+                if eid and eid.partition(":")[0] in _RULER_LABELS:
                     ent._.set("source", "ruler")
-                    log.info(f"[EntityRuler regex hit] {ent.label_}: '{ent.text}' (span {ent.start_char}-{ent.end_char}) id={ent.ent_id_}")
+                    if log_hits:
+                        log.info("[EntityRuler regex hit] %s: '%s' (span %d-%d) id=%s", ent.label_, ent.text, ent.start_char, ent.end_char, rule_id(ent.label_, eid, ent.text))
                     hit_cnt += 1
             if hit_cnt:
-                doc._.ruler_hits = hit_cnt if hasattr(doc._, "ruler_hits") else hit_cnt
+                doc._.ruler_hits = hit_cnt
             return doc
 
-        # Register a doc extension for counting ruler hits (idempotent)
-        from spacy.tokens import Doc
-        if not Doc.has_extension("ruler_hits"):
-            Doc.set_extension("ruler_hits", default=0)
-
-        if "ruler_logger" not in nlp.pipe_names:
-            nlp.add_pipe("ruler_logger", after="entity_ruler")
-
-        # ---------------- Gazetteer / dictionary layer ----------------
-        # Abbrev -> full name + label
-        GAZETTEER: Dict[str, Dict[str, str]] = {
-            "ipc": {"name": "Indian Penal Code, 1860", "label": "STATUTE"},
-            "crpc": {"name": "Code of Criminal Procedure, 1973", "label": "STATUTE"},
-            "cpc": {"name": "Code of Civil Procedure, 1908", "label": "STATUTE"},
-            "sc": {"name": "Supreme Court of India", "label": "COURT"},
-            "hc": {"name": "High Court", "label": "COURT"},
-        }
-        phrase_matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
-        for abbr in ["ipc", "crpc", "cpc", "sc", "hc"]:
-            phrase_matcher.add(f"GAZ_{abbr.upper()}", [nlp.make_doc(abbr)])
+    if "ruler_logger" not in nlp.pipe_names:
+        nlp.add_pipe("ruler_logger", after="legal_phrases")
+    return nlp
 
-        # ---------------- Optional embedding fallback ----------------
-        embed_model = None
-        embed_tokenizer = None
-        statute_names = [
-            "Indian Penal Code, 1860",
-            "Code of Criminal Procedure, 1973",
-            "Code of Civil Procedure, 1908",
-            "Indian Evidence Act, 1872",
-            "Information Technology Act, 2000",
-            "Constitution of India",
-        ]
-        statute_labels = {name: "STATUTE" for name in statute_names}
+
+@functools.lru_cache(maxsize=2)
+def _build_statute_encoder(embed_model_path: str, embed_compile: bool):
+    """Return ``(encode, statute_vecs)`` for the similarity fallback, or None if the model is unusable."""
+    try:
+        import torch
+        from transformers import AutoTokenizer, AutoModel
+        embed_tokenizer = AutoTokenizer.from_pretrained(embed_model_path, local_files_only=True)
+        embed_model = AutoModel.from_pretrained(embed_model_path, local_files_only=True)
+        device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        embed_model.to(device); embed_model.eval()
+        if embed_compile and hasattr(torch, "compile"):
+            # Fuses attention/layernorm/gelu; CUDA graphs only help on GPU, and
+            # dynamic shapes avoid a recompile for every padded batch length
+            embed_model = torch.compile(embed_model, mode="reduce-overhead" if device.type == "cuda" else None, dynamic=True)
+
+        # Half-precision forward (fp16 on CUDA, bf16 on CPU); pooling and norm stay fp32
+        amp_dtype = torch.float16 if device.type == "cuda" else torch.bfloat16
+
+        def encode(texts: List[str]):
+            with torch.inference_mode():
+                enc = embed_tokenizer(texts, padding=True, truncation=True, max_length=256, return_tensors="pt")
+                enc = {k: v.to(device) for k, v in enc.items()}
+                with torch.autocast(device_type=device.type, dtype=amp_dtype):
+                    out = embed_model(**enc)
+                last = out.last_hidden_state.float()
+                mask = enc["attention_mask"].unsqueeze(-1).expand(last.size()).float()
+                pooled = (last * mask).sum(dim=1) / torch.clamp(mask.sum(dim=1), min=1e-9)
+                pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
+                return pooled.cpu()
+        # Statute vectors only change with the model, so reuse them across runs
+        import numpy as np
         statute_vecs = None
-        if args.embed_model_path:
+        cache_path = _statute_cache_path(embed_model_path, list(STATUTE_NAMES), str(amp_dtype))
+        if os.path.exists(cache_path):
             try:
-                import torch
-                from transformers import AutoTokenizer, AutoModel
-                embed_tokenizer = AutoTokenizer.from_pretrained(args.embed_model_path, local_files_only=True)
-                embed_model = AutoModel.from_pretrained(args.embed_model_path, local_files_only=True)
-                device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-                embed_model.to(device); embed_model.eval()
-
-                def encode(texts: List[str]):
-                    with torch.no_grad():
-                        enc = embed_tokenizer(texts, padding=True, truncation=True, max_length=256, return_tensors="pt")
-                        enc = {k: v.to(device) for k, v in enc.items()}
-                        out = embed_model(**enc)
-                        last = out.last_hidden_state
-                        mask = enc["attention_mask"].unsqueeze(-1).expand(last.size()).float()
-                        pooled = (last * mask).sum(dim=1) / torch.clamp(mask.sum(dim=1), min=1e-9)
-                        pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
-                        return pooled.cpu()
-                statute_vecs = encode(statute_names)
-            except Exception as e:
-                log.debug(f"[fallback] embedding model unavailable: {e}")
-                embed_model = None
-                embed_tokenizer = None
+                statute_vecs = torch.from_numpy(np.load(cache_path))
+            except (OSError, ValueError):
                 statute_vecs = None
+        if statute_vecs is None:
+            statute_vecs = encode(list(STATUTE_NAMES))
+            try:
+                os.makedirs(STATUTE_CACHE_DIR, exist_ok=True)
+                tmp = f"{cache_path}.{os.getpid()}.tmp.npy"
+                np.save(tmp, statute_vecs.numpy())
+                os.replace(tmp, cache_path)
+            except OSError:
+                pass  # cache is best-effort
+        return encode, statute_vecs
+    except Exception as e:
+        log.debug(f"[fallback] embedding model unavailable: {e}")
+        return None
 
-        # Helper: overlap check
-        def overlaps(a_start: int, a_end: int, b_start: int, b_end: int) -> bool:
-            return not (a_end <= b_start or b_end <= a_start)
 
-        # Process records and write enriched entities
-        with open(args.output, "w", encoding="utf-8") as out_f:
-            for rec in records:
-                original_text = rec.get("text", "") or ""
-                metadata = rec.get("metadata", {}) or {}
-                # Preprocess only for optional embedding similarity
-                cleaned_text = normalize_sections(normalize_unicode(original_text))
-
-                # Run full pipeline (EntityRuler + NER) on original text to preserve offsets
-                doc_full = nlp(original_text)
-                ents_out: List[Dict[str, Any]] = []
-                taken: List[tuple] = []
-                for ent in doc_full.ents:
-                    span_txt = ent.text
-                    if not span_txt.strip():
-                        continue
-                    # Offsets are from original text already
-                    st, en = ent.start_char, ent.end_char
-                    if any(overlaps(st, en, s, e) for s, e in taken):
-                        continue
-                    source_val = ent._.source if hasattr(ent._, "source") else None
-                    ents_out.append({
-                        "text": original_text[st:en],
-                        "label": ent.label_,
-                        "start": st,
-                        "end": en,
-                        "score": None,
-                        "normalized": normalize_legal_entity(span_txt),
-                        "source": (source_val or "ner"),
-                    })
-                    taken.append((st, en))
-                    if (source_val or "") == "ruler":
-                        log.info(f"[EntityRuler hit] {ent.label_}: {span_txt}")
-
-                # Dictionary/gazetteer layer on original doc
-                doc_orig = nlp.make_doc(original_text)
-                matches = phrase_matcher(doc_orig)
-                for mid, start, end in matches:
-                    span = doc_orig[start:end]
-                    key = span.text.lower()
-                    info = GAZETTEER.get(key)
-                    if not info:
-                        continue
-                    st, en = span.start_char, span.end_char
-                    if any(overlaps(st, en, s, e) for s, e in taken):
-                        continue
+@functools.lru_cache(maxsize=2)
+def _build_hf_pipeline(model_path: str, device: str, aggregation: str):
+    """Load a local token-classification model as a transformers pipeline."""
+    from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
+    # Resolve device for transformers
+    if device and device.startswith("cuda"):
+        device_id = 0 if ":" not in device else int(device.split(":", 1)[1])
+    else:
+        device_id = -1
+    tok = AutoTokenizer.from_pretrained(model_path, local_files_only=True)
+    mdl = AutoModelForTokenClassification.from_pretrained(model_path, local_files_only=True)
+    return pipeline("token-classification", model=mdl, tokenizer=tok, aggregation_strategy=(None if aggregation == "none" else aggregation), device=device_id)
+
+
+def run(args: argparse.Namespace, records: Iterable[Dict[str, Any]], out_f: BinaryIO) -> None:
+    """NER every record and write one JSONL line per record to ``out_f``, in input order."""
+    records = iter(records)  # consumed in windows below; a list would restart every islice
+    log_hits = log.isEnabledFor(logging.INFO)
+
+    if args.framework == "spacy":
+        from app.legal_normalizer import normalize_unicode, normalize_sections, normalize_legal_entity
+
+        nlp = _build_spacy_pipeline(args.spacy_model, args.regex_engine)
+
+        # Worker processes would each re-initialize CUDA; fan out only a CPU transformer
+        n_process = args.spacy_nproc
+        if n_process != 1 and "transformer" in nlp.pipe_names:
+            if nlp.get_pipe("transformer").model.ops.device_type != "cpu":
+                log.warning("--spacy-nproc %d ignored: transformer runs on GPU", n_process)
+                n_process = 1
+
+        # ---------------- Optional embedding fallback ----------------
+        encoder = _build_statute_encoder(args.embed_model_path, args.embed_compile) if args.embed_model_path else None
+
+        # Records are written in input order once per batch, after one fallback encode
+        pending: List[Dict[str, Any]] = []
+        fallback: List[tuple] = []
+
+        def add_fallback_statutes() -> None:
+            try:
+                import torch
+                encode, statute_vecs = encoder
+                q_vecs = encode([text for _, text in fallback])
+                # Rows are L2-normalized, so one (N x H) @ (H x K) matmul gives all cosines
+                best_sims, best_idxs = torch.max(q_vecs @ statute_vecs.T, dim=1)
+            except Exception as e:
+                log.debug(f"[fallback] similarity error: {e}")
+                return
+            for (ents_out, _), best_sim, best_idx in zip(fallback, best_sims.tolist(), best_idxs.tolist()):
+                if best_sim >= 0.8:
+                    name = STATUTE_NAMES[best_idx]
                     ents_out.append({
-                        "text": info["name"],  # replace with canonical full name
-                        "label": info["label"],
-                        "start": st,
-                        "end": en,
-                        "score": 1.0,
-                        "normalized": normalize_legal_entity(info["name"]),
-                        "source": "dictionary",
+                        "text": name,
+                        "label": STATUTE_LABELS[name],
+                        "start": 0,
+                        "end": 0,
+                        "score": best_sim,
+                        "normalized": normalize_legal_entity(name),
+                        "source": "fallback_similarity",
                     })
-                    taken.append((st, en))
-                    log.info(f"[Dictionary hit] {info['label']}: {info['name']}")
-
-                # Optional fallback similarity using embeddings
-                if embed_model is not None and statute_vecs is not None and len(ents_out) > 0:
-                    try:
-                        # Only consider adding a STATUTE if none exists yet
-                        if not any(e.get("label") == "STATUTE" for e in ents_out):
-                            q_vec = encode([cleaned_text])  # type: ignore[name-defined]
-                            import torch
-                            sims = torch.nn.functional.cosine_similarity(q_vec, statute_vecs)[0]
-                            best_idx = int(torch.argmax(sims).item())
-                            best_sim = float(sims[best_idx].item())
-                            if best_sim >= 0.8:
-                                name = statute_names[best_idx]
-                                ents_out.append({
-                                    "text": name,
-                                    "label": statute_labels[name],
-                                    "start": 0,
-                                    "end": 0,
-                                    "score": best_sim,
-                                    "normalized": normalize_legal_entity(name),
-                                    "source": "fallback_similarity",
-                                })
-                                log.info(f"[Fallback similarity hit] {name} (sim={best_sim:.2f})")
-                    except Exception as e:
-                        log.debug(f"[fallback] similarity error: {e}")
-
-                obj = {
-                    "text": original_text,
-                    "metadata": metadata,
-                    "entities": ents_out,
-                }
-                json.dump(obj, out_f, ensure_ascii=False)
-                out_f.write("\n")
-                try:
-                    if hasattr(doc_full._, "ruler_hits") and doc_full._.ruler_hits:
-                        log.debug(f"[EntityRuler] hits in doc: {doc_full._.ruler_hits}")
-                except Exception:
-                    pass
+                    if log_hits:
+                        log.info("[Fallback similarity hit] %s (sim=%.2f)", name, best_sim)
+
+        def flush(out_f) -> None:
+            if fallback:
+                add_fallback_statutes()
+            # One write per batch instead of one per record
+            out_f.write(b"".join(map(_dump_line, pending)))
+            pending.clear()
+            fallback.clear()
+
+        # Process records and write enriched entities
+        # Run full pipeline (EntityRuler + NER) on original text to preserve offsets;
+        # nlp.pipe batches records (and optionally fans out to worker processes)
+        texts = ((rec.get("text", "") or "", rec) for rec in records)
+        for doc_full, rec in nlp.pipe(texts, as_tuples=True, batch_size=args.spacy_batch, n_process=n_process):
+            original_text = doc_full.text
+            metadata = rec.get("metadata", {}) or {}
+
+            ents_out: List[Dict[str, Any]] = []
+            taken = _Taken()
+            for ent in doc_full.ents:
+                span_txt = ent.text
+                if not span_txt.strip():
+                    continue
+                # Offsets are from original text already
+                st, en = ent.start_char, ent.end_char
+                if taken.overlaps(st, en):
+                    continue
+                # "source" is registered once above; no per-entity hasattr
+                source_val = ent._.source
+                ents_out.append({
+                    "text": span_txt,  # ent.text, already sliced from the original text
+                    "label": ent.label_,
+                    "start": st,
+                    "end": en,
+                    "score": None,
+                    "normalized": normalize_legal_entity(span_txt),
+                    "source": (source_val or "ner"),
+                })
+                taken.add(st, en)
+                if log_hits and source_val == "ruler":
+                    log.info("[EntityRuler hit] %s: %s", ent.label_, span_txt)
+
+            # Dictionary/gazetteer layer on original text
+            for m in _GAZ_RE.finditer(original_text):
+                info = GAZETTEER[m.group(0).lower()]
+                st, en = m.span()
+                if taken.overlaps(st, en):
+                    continue
+                ents_out.append({
+                    "text": info["name"],  # replace with canonical full name
+                    "label": info["label"],
+                    "start": st,
+                    "end": en,
+                    "score": 1.0,
+                    "normalized": normalize_legal_entity(info["name"]),
+                    "source": "dictionary",
+                })
+                taken.add(st, en)
+                if log_hits:
+                    log.info("[Dictionary hit] %s: %s", info["label"], info["name"])
+
+            # Optional fallback similarity using embeddings: only consider adding a
+            # STATUTE if none exists yet; encoded together per flush below
+            if encoder is not None and ents_out:
+                if not any(e.get("label") == "STATUTE" for e in ents_out):
+                    # Preprocess only for the embedding similarity
+                    fallback.append((ents_out, normalize_sections(normalize_unicode(original_text))))
+
+            pending.append({
+                "text": original_text,
+                "metadata": metadata,
+                "entities": ents_out,
+            })
+            if len(pending) >= args.spacy_batch:
+                flush(out_f)
+            if doc_full._.ruler_hits:
+                log.debug("[EntityRuler] hits in doc: %d", doc_full._.ruler_hits)
+        flush(out_f)
         return
 
     # transformers framework
-    from transformers import AutoTokenizer, AutoModelForTokenClassification, pipeline
-    # Resolve device for transformers
-    if args.device and args.device.startswith("cuda"):
-        device = 0 if ":" not in args.device else int(args.device.split(":", 1)[1])
-    else:
-        device = -1
     if not args.model_path:
         raise ValueError("--model-path is required when --framework=transformers")
-    tok = AutoTokenizer.from_pretrained(args.model_path, local_files_only=True)
-    mdl = AutoModelForTokenClassification.from_pretrained(args.model_path, local_files_only=True)
-    nlp = pipeline("token-classification", model=mdl, tokenizer=tok, aggregation_strategy=(None if args.aggregation == "none" else args.aggregation), device=device)
-
-    with open(args.output, "w", encoding="utf-8") as out_f:
-        for i in range(0, len(records), args.batch_size):
-            batch = records[i:i+args.batch_size]
-            texts = [r.get("text", "") for r in batch]
-            results = nlp(texts, batch_size=args.batch_size, truncation=True)
-            if isinstance(results, dict) or (results and isinstance(results[0], dict)):
-                results = [results] if isinstance(results, dict) else [results]
-            for rec, ents in zip(batch, results):
-                norm_ents = []
-                for e in ents or []:
-                    norm_ents.append({
-                        "text": e.get("word") or e.get("text"),
-                        "label": e.get("entity_group") or e.get("entity"),
-                        "start": e.get("start"),
-                        "end": e.get("end"),
-                        "score": float(e.get("score", 0.0)) if e.get("score") is not None else None,
-                        "source": "ner",
-                    })
-                obj = {
-                    "text": rec.get("text"),
-                    "metadata": rec.get("metadata", {}),
-                    "entities": norm_ents,
-                }
-                json.dump(obj, out_f, ensure_ascii=False)
-                out_f.write("\n")
+    nlp = _build_hf_pipeline(args.model_path, args.device, args.aggregation)
+
+    # Records are read a window at a time and length-sorted inside it, so each forward
+    # batch pads to neighbours of similar length; output is restored to input order
+    window = args.batch_size * 16
+    while True:
+        batch = list(itertools.islice(records, window))
+        if not batch:
+            break
+        order = sorted(range(len(batch)), key=lambda i: len(batch[i].get("text", "") or ""))
+        texts = [batch[i].get("text", "") for i in order]
+        results = nlp(texts, batch_size=args.batch_size, num_workers=args.num_workers, truncation=True)
+        # A list input yields one List[dict] per text
+        if len(results) != len(texts):
+            raise RuntimeError(f"token-classification returned {len(results)} results for {len(texts)} texts")
+        by_input: List[Any] = [None] * len(batch)
+        for i, ents in zip(order, results):
+            by_input[i] = ents
+        lines: List[bytes] = []
+        for rec, ents in zip(batch, by_input):
+            norm_ents = []
+            for e in ents or []:
+                norm_ents.append({
+                    "text": e.get("word") or e.get("text"),
+                    "label": e.get("entity_group") or e.get("entity"),
+                    "start": e.get("start"),
+                    "end": e.get("end"),
+                    "score": float(e.get("score", 0.0)) if e.get("score") is not None else None,
+                    "source": "ner",
+                })
+            obj = {
+                "text": rec.get("text"),
+                "metadata": rec.get("metadata", {}),
+                "entities": norm_ents,
+            }
+            lines.append(_dump_line(obj))
+        out_f.write(b"".join(lines))
+
+
+def run_records(args: argparse.Namespace, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """NER records in-process and return their output records (callers already inside ner_env)."""
+    buf = io.BytesIO()
+    run(args, records, buf)
+    return [_loads(line) for line in buf.getvalue().splitlines()]
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Answer each JSONL record read from stdin with its NER JSONL line on stdout.
+
+    Models load on the first request and stay resident, so a long-lived caller pays the
+    interpreter start-up, imports and model load once instead of once per query.
+    """
+    out = sys.stdout.buffer
+    # Anything a library prints must not interleave with protocol lines
+    sys.stdout = sys.stderr
+    # One record per request: worker processes would be started for every call
+    args.spacy_nproc = 1
+    for line in sys.stdin.buffer:
+        line = line.strip()
+        if not line:
+            continue
+        buf = io.BytesIO()
+        try:
+            run(args, [_loads(line)], buf)
+        except Exception as e:
+            log.exception("NER request failed")
+            buf = io.BytesIO(_dump_line({"error": str(e)}))
+        out.write(buf.getvalue())
+        out.flush()
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Per-hit logs are INFO; set LG_LOG_LEVEL=INFO (or DEBUG) to see them
+    logging.basicConfig(level=os.getenv("LG_LOG_LEVEL", "WARNING").upper())
+
+    if args.server:
+        serve(args)
+        return
+    if not args.input or not args.output:
+        raise SystemExit("--input and --output are required unless --server is given")
+    if not os.path.exists(args.input):
+        raise FileNotFoundError(f"Input not found: {args.input}")
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+
+    with open(args.output, "wb") as out_f:
+        # Records are parsed lazily while the model consumes them
+        run(args, iter_records(args.input), out_f)
 
 
 if __name__ == "__main__":
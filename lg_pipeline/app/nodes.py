@@ -1,18 +1,42 @@
 from __future__ import annotations
+import atexit
+import functools
 import json
+import logging
 import os
+import sys
+import threading
 from datetime import datetime, timezone
-from typing import List, Dict, Any
+from itertools import zip_longest
+from typing import List, Dict, Any, Tuple
 import unicodedata
 import re
 
 from docx import Document
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from .types import SplitterConfig, Chunk, PipelineInput, PipelineOutput
-import tempfile
+from .text_splitter import get_splitter, merge_small_chunks
 from .legal_normalizer import normalize_legal_entity, phonetic_key
 
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dump_line(obj: Any) -> bytes:
+        # embed_node hands over float32 numpy rows; orjson writes them without .tolist()
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE)
+except ImportError:  # pragma: no cover - optional dependency
+    _loads = json.loads
+
+    def _numpy_default(obj: Any) -> Any:
+        if hasattr(obj, "tolist"):
+            return obj.tolist()
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+    def _dump_line(obj: Any) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False, default=_numpy_default) + "\n").encode("utf-8")
+
 
 # --------------------- Canonical entity key helpers ---------------------
 
@@ -21,22 +45,36 @@ def _normalize_label(label: str | None) -> str:
     return (label or "").strip().upper()
 
 
+_VS_RE = re.compile(r"\b(vs?\.)\b", re.IGNORECASE)
+# Initials and whitespace runs in one pass: an initials match never starts on whitespace
+# and never collapses to "", so this equals collapsing initials and then whitespace
+_INITIALS_OR_WS_RE = re.compile(r"(?P<init>\b(?:[A-Za-z]\.?\s*){2,}\b)|\s+")
+_TRAIL_DIGITS_RE = re.compile(r"\d+$")
+_VS_SPLIT_RE = re.compile(r"\b(?:v|vs)\.?\b", re.IGNORECASE)
+
+
+def _collapse_initials_or_ws(m: re.Match) -> str:
+    if m.lastgroup:
+        # 'S. K.' -> 'SK': a match holds only letters, dots and whitespace
+        return "".join(m.group(0).replace(".", "").split())
+    return " "
+
+
 def _normalize_text(text: str | None) -> str:
     """Normalize entity text robustly: unicode, whitespace, quotes, punctuation, casefold."""
-    s = unicodedata.normalize("NFKC", text or "")
-    # remove zero-width chars
-    s = s.replace("\u200b", "")
-    # unify curly quotes
-    s = s.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
+    s = text or ""
+    # NFKC, zero-width and curly-quote handling are all no-ops on pure-ASCII text
+    if not s.isascii():
+        s = unicodedata.normalize("NFKC", s)
+        # remove zero-width chars
+        s = s.replace("\u200b", "")
+        # unify curly quotes
+        s = s.replace("“", '"').replace("”", '"').replace("‘", "'").replace("’", "'")
     # remove legal stopwords like 'v.', 'vs.' (whole-word, case-insensitive)
-    s = re.sub(r"\b(vs?\.)\b", " ", s, flags=re.IGNORECASE)
-    # collapse sequences of initials like 'S. K.' or abbreviations like 'V.R.' -> 'sk', 'vr'
-    def _collapse_initials(m: re.Match) -> str:
-        letters = re.findall(r"[A-Za-z]", m.group(0))
-        return "".join(letters)
-    s = re.sub(r"\b(?:[A-Za-z]\.?\s*){2,}\b", _collapse_initials, s)
-    # collapse whitespace
-    s = re.sub(r"\s+", " ", s).strip()
+    s = _VS_RE.sub(" ", s)
+    # collapse sequences of initials like 'S. K.' or abbreviations like 'V.R.' -> 'sk', 'vr',
+    # and collapse whitespace
+    s = _INITIALS_OR_WS_RE.sub(_collapse_initials_or_ws, s).strip()
     # trim common edge punctuation (keep internal punctuation)
     s = s.strip(" .,:;()[]{}\"'\u00A0")
     # casefold for robust lowercase across locales
@@ -55,6 +93,10 @@ def make_entity_key(label: str | None, text: str | None) -> str:
 KEYWORD_ENTITY_MAP: Dict[str, str] = {
     "court": "ORG",
 }
+# Compiled once per keyword: whole word, case-insensitive
+_KEYWORD_PATTERNS: Dict[str, re.Pattern] = {
+    kw: re.compile(rf"(?i)(?<!\w){re.escape(kw)}(?!\w)") for kw in KEYWORD_ENTITY_MAP
+}
 
 def _augment_entities_with_keywords(text: str, entities: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Add keyword-based entities if not already present by normalized text (case-insensitive, whole word)."""
@@ -62,7 +104,7 @@ def _augment_entities_with_keywords(text: str, entities: List[Dict[str, Any]]) -
     existing_norm = { _normalize_text(e.get("text")) for e in entities if e.get("text") }
     s = text or ""
     for kw, label in KEYWORD_ENTITY_MAP.items():
-        for m in re.finditer(rf"(?i)(?<!\w){re.escape(kw)}(?!\w)", s):
+        for m in _KEYWORD_PATTERNS[kw].finditer(s):
             span = m.group(0)
             norm = _normalize_text(span)
             if norm in existing_norm:
@@ -80,11 +122,57 @@ def _augment_entities_with_keywords(text: str, entities: List[Dict[str, Any]]) -
     return entities
 
 
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Run children python-docx maps to text; w:br is "\n" only for (default) text-wrapping breaks
+_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+
+def _paragraph_text(p) -> str:
+    """Text of a w:p exactly as python-docx ``Paragraph.text`` builds it."""
+    parts: List[str] = []
+    for child in p:
+        if child.tag == _W + "r":
+            runs = (child,)
+        elif child.tag == _W + "hyperlink":
+            runs = child.iterchildren(_W + "r")
+        else:
+            continue
+        for r in runs:
+            for e in r:
+                if e.tag == _W + "t":
+                    parts.append(e.text or "")
+                elif e.tag == _W + "br":
+                    if e.get(_W + "type", "textWrapping") == "textWrapping":
+                        parts.append("\n")
+                elif e.tag in _RUN_TEXT:
+                    parts.append(_RUN_TEXT[e.tag])
+    return "".join(parts)
+
+
+def _iter_docx_paragraphs(path: str):
+    """Stream body-level paragraph texts from word/document.xml, freeing each one once read."""
+    import zipfile
+    from lxml import etree
+
+    with zipfile.ZipFile(path) as z, z.open("word/document.xml") as f:
+        for _, p in etree.iterparse(f, events=("end",), tag=_W + "p"):
+            parent = p.getparent()
+            # Same set as Document.paragraphs: direct children of w:body (no table cells)
+            if parent is not None and parent.tag == _W + "body":
+                yield _paragraph_text(p)
+                p.clear()
+                while p.getprevious() is not None:
+                    del parent[0]
+
+
 def _read_docx_text(path: str) -> str:
-    doc = Document(path)
+    try:
+        texts = list(_iter_docx_paragraphs(path))
+    except Exception:
+        # Non-standard package (e.g. main part not at word/document.xml): let python-docx resolve it
+        texts = [p.text for p in Document(path).paragraphs]
     # Join paragraphs; skip empties
-    paragraphs = [p.text for p in doc.paragraphs if p.text and p.text.strip()]
-    return "\n\n".join(paragraphs)
+    return "\n\n".join(t for t in texts if t and t.strip())
 
 
 def load_node(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -115,21 +203,24 @@ def split_node(state: Dict[str, Any]) -> Dict[str, Any]:
     raw_text: str = state["raw_text"]
     cfg: Dict[str, Any] = state.get("config") or {}
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=cfg.get("chunk_size", 1200),
-        chunk_overlap=cfg.get("chunk_overlap", 200),
-        separators=cfg.get("separators", None),
-    )
+    chunk_size = cfg.get("chunk_size", 1200)
+    chunk_overlap = cfg.get("chunk_overlap", 200)
+    separators = cfg.get("separators")
+    text_splitter = get_splitter(chunk_size, chunk_overlap, tuple(separators) if separators else None)
 
     texts: List[str] = text_splitter.split_text(raw_text)
+    if cfg.get("merge_small_chunks"):
+        texts = merge_small_chunks(raw_text, texts, chunk_size, chunk_overlap)
     total = len(texts)
 
     base_meta: Dict[str, Any] = state.get("metadata", {}).copy()
     base_meta["splitter_config"] = {
-        "chunk_size": cfg.get("chunk_size", 1200),
-        "chunk_overlap": cfg.get("chunk_overlap", 200),
-        "separators": cfg.get("separators"),
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "separators": separators,
     }
+    if cfg.get("merge_small_chunks"):
+        base_meta["splitter_config"]["merge_small_chunks"] = True
 
     chunks: List[Chunk] = []
     for i, t in enumerate(texts):
@@ -151,6 +242,27 @@ def split_node(state: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+_WRITE_BATCH = 1024
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    """Parse every non-blank line; one comprehension beats a strip/append loop per line."""
+    with open(path, "rb") as f:
+        return [_loads(line) for line in f if not line.isspace()]
+
+
+def _write_jsonl(path: str, objs) -> None:
+    """Write one JSON object per line, joining batches so each costs a single write()."""
+    buf: List[bytes] = []
+    with open(path, "wb", buffering=1 << 20) as f:
+        for obj in objs:
+            buf.append(_dump_line(obj))
+            if len(buf) >= _WRITE_BATCH:
+                f.write(b"".join(buf))
+                buf.clear()
+        f.write(b"".join(buf))
+
+
 def save_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Save chunks into JSONL file with metadata (one object per line)."""
     input_path = state["input_path"]
@@ -166,10 +278,7 @@ def save_node(state: Dict[str, Any]) -> Dict[str, Any]:
         output_path = os.path.splitext(output_path)[0] + ".jsonl"
 
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        for c in chunks:
-            json.dump({"text": c.text, "metadata": c.metadata}, f, ensure_ascii=False)
-            f.write("\n")
+    _write_jsonl(output_path, ({"text": c.text, "metadata": c.metadata} for c in chunks))
 
     # Return output path and keep chunks for potential downstream use
     return {
@@ -189,8 +298,8 @@ def load_json_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    with open(input_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    with open(input_path, "rb") as f:
+        data = _loads(f.read())
 
     items = data.get("results", [])
     return {
@@ -201,30 +310,41 @@ def load_json_node(state: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _split_case(job: Tuple[Any, str, int, int, Tuple[str, ...] | None, bool]) -> List[Dict[str, Any]]:
+    """Split one JSON case; module-level so worker processes can unpickle it."""
+    case_id, content, chunk_size, chunk_overlap, separators, merge_small = job
+    splits = get_splitter(chunk_size, chunk_overlap, separators).split_text(content)
+    if merge_small:
+        splits = merge_small_chunks(content, splits, chunk_size, chunk_overlap)
+    return [{"case_id": case_id, "chunk_id": i, "text": split} for i, split in enumerate(splits)]
+
+
 def split_json_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Split each item's text using LangChain. Output simple chunks list."""
     items = state.get("items", [])
     cfg: Dict[str, Any] = state.get("config", {})
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=cfg.get("chunk_size", 1000),
-        chunk_overlap=cfg.get("chunk_overlap", 200),
-        separators=cfg.get("separators", None),
-    )
+    chunk_size = cfg.get("chunk_size", 1000)
+    chunk_overlap = cfg.get("chunk_overlap", 200)
+    separators = cfg.get("separators")
+    seps = tuple(separators) if separators else None
+    merge_small = bool(cfg.get("merge_small_chunks"))
+    workers = int(cfg.get("workers") or 1)
+
+    jobs = [
+        (case.get("id", "unknown"), case.get("doc", ""), chunk_size, chunk_overlap, seps, merge_small)
+        for case in items
+        if case.get("doc", "")
+    ]
+    # Cases are independent; a pool only pays for its start-up on more than a handful
+    if workers > 1 and len(jobs) > 4:
+        from concurrent.futures import ProcessPoolExecutor
 
-    chunks_simple: List[Dict[str, Any]] = []
-    for case in items:
-        case_id = case.get("id", "unknown")
-        content = case.get("doc", "")
-        if not content:
-            continue
-        splits = text_splitter.split_text(content)
-        for i, split in enumerate(splits):
-            chunks_simple.append({
-                "case_id": case_id,
-                "chunk_id": i,
-                "text": split,
-            })
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            per_case = list(ex.map(_split_case, jobs, chunksize=8))
+    else:
+        per_case = [_split_case(job) for job in jobs]
+    chunks_simple: List[Dict[str, Any]] = [c for case_chunks in per_case for c in case_chunks]
 
     return {
         "chunks_simple": chunks_simple,
@@ -249,10 +369,7 @@ def save_json_simple_node(state: Dict[str, Any]) -> Dict[str, Any]:
         output_path = os.path.splitext(output_path)[0] + ".jsonl"
 
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        for obj in chunks_simple:
-            json.dump(obj, f, ensure_ascii=False)
-            f.write("\n")
+    _write_jsonl(output_path, chunks_simple)
 
     return {
         "output_path": output_path,
@@ -270,26 +387,83 @@ def load_jsonl_chunks_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if not input_path or not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    records: List[Dict[str, Any]] = []
-    with open(input_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            # Expect {text, metadata}
-            records.append(obj)
+    # Expect {text, metadata}
+    records: List[Dict[str, Any]] = _read_jsonl(input_path)
 
     return {
         "records": records,
         "model_path": state.get("model_path"),
         "batch_size": state.get("batch_size", 32),
         "device": state.get("device"),
+        "embed_dtype": state.get("embed_dtype", "fp32"),
+        "embed_store": state.get("embed_store", "npy"),
+        "embed_store_dtype": state.get("embed_store_dtype", "fp32"),
+        "embed_compile": bool(state.get("embed_compile")),
+        "embed_workers": int(state.get("embed_workers") or 0),
         "input_path": input_path,
         "output_path": state.get("output_path"),
     }
 
 
+def _pad_features(tokenizer, batch_features: List[Dict[str, Any]]):
+    """DataLoader collate: pad pre-tokenized ids; module-level so spawned workers can pickle it."""
+    return tokenizer.pad(
+        batch_features,
+        padding=True,
+        # multiple-of-8 sequence lengths keep fp16/bf16 matmuls on Tensor Core shapes
+        pad_to_multiple_of=8,
+        return_tensors="pt",
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _resolve_model_dir(root: str) -> str:
+    """Resolve the actual model directory (handles pointing at a cache root with subfolders).
+    Memoized per path; the checkpoint tree does not change during a run.
+    """
+    root = os.path.abspath(root)
+    cfg = os.path.join(root, "config.json")
+    if os.path.isfile(cfg):
+        return root
+
+    def score_dir(d: str) -> tuple:
+        score = 0
+        for tf in ("tokenizer.json", "spiece.model", "vocab.txt", "tokenizer.model"):  # common tokenizer files
+            if os.path.isfile(os.path.join(d, tf)):
+                score += 1
+        # Prefer snapshot directories (HF cache) slightly
+        if os.path.basename(os.path.dirname(d)) == "snapshots":
+            score += 1
+        mtime = os.path.getmtime(d)
+        return (score, mtime)
+
+    # Walk up to a few levels to handle HF cache layout: models--<repo> / snapshots / <rev>
+    candidates: list[tuple[int, float, str]] = []
+    max_depth = 4
+    try:
+        for current_root, dirs, files in os.walk(root):
+            # depth limit
+            rel = os.path.relpath(current_root, root)
+            depth = 0 if rel == "." else rel.count(os.sep) + 1
+            if depth > max_depth:
+                # prune deeper traversal
+                dirs[:] = []
+                continue
+            if "config.json" in files:
+                s, m = score_dir(current_root)
+                candidates.append((s, m, current_root))
+    except FileNotFoundError:
+        pass
+
+    if not candidates:
+        raise FileNotFoundError(
+            f"Could not find a model directory with config.json under: {root}. "
+            f"Point --model-path to a folder that directly contains config.json (e.g., the 'snapshots/<rev>' directory)."
+        )
+    candidates.sort(key=lambda x: (x[0], x[1]), reverse=True)
+    return candidates[0][2]
+
+
 def embed_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Generate embeddings using a local Hugging Face model directory."""
     import numpy as np
@@ -300,63 +474,22 @@ def embed_node(state: Dict[str, Any]) -> Dict[str, Any]:
     model_path: str | None = state.get("model_path")
     batch_size: int = int(state.get("batch_size", 32))
     device_arg = state.get("device")
+    embed_dtype: str = state.get("embed_dtype") or "fp32"
 
     if not model_path:
         raise ValueError("model_path is required for embedding. Provide a folder containing config.json and tokenizer files.")
 
-    # Resolve actual model directory (handles pointing at a cache root with subfolders)
-    def _resolve_model_dir(root: str) -> str:
-        root = os.path.abspath(root)
-        cfg = os.path.join(root, "config.json")
-        if os.path.isfile(cfg):
-            return root
-
-        def score_dir(d: str) -> tuple:
-            score = 0
-            for tf in ("tokenizer.json", "spiece.model", "vocab.txt", "tokenizer.model"):  # common tokenizer files
-                if os.path.isfile(os.path.join(d, tf)):
-                    score += 1
-            # Prefer snapshot directories (HF cache) slightly
-            if os.path.basename(os.path.dirname(d)) == "snapshots":
-                score += 1
-            mtime = os.path.getmtime(d)
-            return (score, mtime)
-
-        # Walk up to a few levels to handle HF cache layout: models--<repo> / snapshots / <rev>
-        candidates: list[tuple[int, float, str]] = []
-        max_depth = 4
-        try:
-            for current_root, dirs, files in os.walk(root):
-                # depth limit
-                rel = os.path.relpath(current_root, root)
-                depth = 0 if rel == "." else rel.count(os.sep) + 1
-                if depth > max_depth:
-                    # prune deeper traversal
-                    dirs[:] = []
-                    continue
-                if "config.json" in files:
-                    s, m = score_dir(current_root)
-                    candidates.append((s, m, current_root))
-        except FileNotFoundError:
-            pass
-
-        if not candidates:
-            raise FileNotFoundError(
-                f"Could not find a model directory with config.json under: {root}. "
-                f"Point --model-path to a folder that directly contains config.json (e.g., the 'snapshots/<rev>' directory)."
-            )
-        candidates.sort(key=lambda x: (x[0], x[1]), reverse=True)
-        return candidates[0][2]
-
     model_dir = _resolve_model_dir(model_path)
 
     # Load model/tokenizer from resolved path (local only)
     try:
-        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True, use_fast=True)
     except Exception as e:
         raise RuntimeError(f"Failed to load tokenizer from {model_dir}. Ensure tokenizer files exist (e.g., tokenizer.json or spiece.model). Original error: {e}")
+    # int8 loads fp32 weights and quantizes the Linear layers after loading
+    torch_dtype = {"fp16": torch.float16, "bf16": torch.bfloat16}.get(embed_dtype, torch.float32)
     try:
-        model = AutoModel.from_pretrained(model_dir, local_files_only=True)
+        model = AutoModel.from_pretrained(model_dir, local_files_only=True, torch_dtype=torch_dtype)
     except Exception as e:
         raise RuntimeError(f"Failed to load model weights from {model_dir}. Ensure config.json and model weights exist. Original error: {e}")
 
@@ -365,43 +498,59 @@ def embed_node(state: Dict[str, Any]) -> Dict[str, Any]:
         device = torch.device(device_arg)
     else:
         device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    if embed_dtype == "int8":
+        if device.type != "cpu":
+            raise ValueError("embed_dtype int8 uses dynamic quantization and is only supported on cpu")
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
     model.to(device)
     model.eval()
+    if state.get("embed_compile") and hasattr(torch, "compile") and embed_dtype != "int8":
+        # CUDA graphs only help on GPU; dynamic shapes avoid a recompile per padded batch length
+        model = torch.compile(model, mode="reduce-overhead" if device.type == "cuda" else None, dynamic=True)
+
+    # Tokenize the whole file in one call to the Rust tokenizer; batches then only pad ids
+    enc = tokenizer([r.get("text", "") for r in records], padding=False, truncation=True, max_length=512) if records else {}
+    features = [dict(zip(enc.keys(), row)) for row in zip(*enc.values())]
+    # Batch texts of similar token length so short chunks are not padded to the longest in the
+    # file; results are written back by original index to keep the input order
+    order = sorted(range(len(records)), key=lambda j: len(features[j]["input_ids"]))
+    batches = [order[i:i+batch_size] for i in range(0, len(order), batch_size)]
+
+    # Workers pad the next batches (into pinned memory on CUDA) while the model runs the
+    # current one; batches come back in sampler order, so they line up with ``batches``
+    num_workers = int(state.get("embed_workers") or 0)
+    pin = device.type == "cuda"
+    loader = torch.utils.data.DataLoader(
+        features,
+        batch_sampler=batches,
+        collate_fn=functools.partial(_pad_features, tokenizer),
+        num_workers=num_workers,
+        pin_memory=pin,
+        **({"prefetch_factor": 2} if num_workers > 0 else {}),
+    )
 
-    def mean_pool(last_hidden_state: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
-        mask = attention_mask.unsqueeze(-1).expand(last_hidden_state.size()).float()
-        masked = last_hidden_state * mask
-        summed = masked.sum(dim=1)
-        counts = torch.clamp(mask.sum(dim=1), min=1e-9)
-        return summed / counts
-
-    embeddings: List[Dict[str, Any]] = []
-    with torch.no_grad():
-        for i in range(0, len(records), batch_size):
-            batch = records[i:i+batch_size]
-            texts = [r.get("text", "") for r in batch]
-            encoded = tokenizer(
-                texts,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt",
-            )
-            encoded = {k: v.to(device) for k, v in encoded.items()}
+    embeddings: List[Dict[str, Any]] = [None] * len(records)  # type: ignore[list-item]
+    # inference_mode also skips autograd version-counter bookkeeping on every tensor
+    with torch.inference_mode():
+        for idx, encoded in zip(batches, loader):
+            batch = [records[j] for j in idx]
+            encoded = {k: v.to(device, non_blocking=pin) for k, v in encoded.items()}
             outputs = model(**encoded)
-            # Use last_hidden_state mean pooling
+            # Masked mean over last_hidden_state as one batched matmul (no expanded mask copy);
+            # the division and L2 norm run in fp32 whatever the model precision
             last_hidden = outputs.last_hidden_state
-            pooled = mean_pool(last_hidden, encoded["attention_mask"])  # (B, H)
-            # L2 normalize
+            mask = encoded["attention_mask"]
+            summed = torch.einsum("bsh,bs->bh", last_hidden, mask.to(last_hidden.dtype)).float()
+            pooled = summed / mask.sum(dim=1, keepdim=True).clamp_(min=1).float()  # (B, H)
             pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
 
-            vecs = pooled.cpu().numpy().astype(np.float32)
-            for rec, vec in zip(batch, vecs):
-                embeddings.append({
+            vecs = pooled.cpu().numpy()
+            for j, rec, vec in zip(idx, batch, vecs):
+                embeddings[j] = {
                     "text": rec.get("text"),
                     "metadata": rec.get("metadata", {}),
-                    "embedding": vec.tolist(),
-                })
+                    "embedding": vec,
+                }
 
     return {
         "embeddings": embeddings,
@@ -410,14 +559,29 @@ def embed_node(state: Dict[str, Any]) -> Dict[str, Any]:
         "model_path": model_path,
         "batch_size": batch_size,
         "device": str(device),
+        "embed_dtype": embed_dtype,
+        "embed_store": state.get("embed_store", "npy"),
+        "embed_store_dtype": state.get("embed_store_dtype", "fp32"),
     }
 
 
+def _vectors_path(jsonl_path: str) -> str:
+    """Side-car matrix written next to an embeddings JSONL: x.embeddings.jsonl -> x.embeddings.npy."""
+    return os.path.splitext(jsonl_path)[0] + ".npy"
+
+
 def save_embeddings_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Save embeddings JSONL: {text, metadata, embedding[]} per line."""
+    """Save embeddings JSONL.
+
+    With embed_store "npy" (default) vectors go to a side-car .npy matrix and each line is
+    {text, metadata, row}; with "jsonl" each line carries the vector inline as embedding[].
+    The side-car can be stored as fp16, or as int8 with a per-vector "scale" on each line.
+    """
     input_path = state.get("input_path")
     output_path = state.get("output_path")
     records = state.get("embeddings", [])
+    embed_store = state.get("embed_store") or "npy"
+    store_dtype = state.get("embed_store_dtype") or "fp32"
 
     if not output_path:
         base, _ = os.path.splitext(input_path or "output")
@@ -427,10 +591,25 @@ def save_embeddings_node(state: Dict[str, Any]) -> Dict[str, Any]:
         output_path = os.path.splitext(output_path)[0] + ".jsonl"
 
     os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        for obj in records:
-            json.dump(obj, f, ensure_ascii=False)
-            f.write("\n")
+    if embed_store == "npy" and records:
+        import numpy as np
+
+        vecs = np.stack([r["embedding"] for r in records]).astype(np.float32, copy=False)
+        scales = None
+        if store_dtype == "fp16":
+            vecs = vecs.astype(np.float16)
+        elif store_dtype == "int8":
+            # Symmetric per-vector scale; all-zero rows keep scale 1 to avoid dividing by zero
+            scales = np.abs(vecs).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            vecs = np.rint(vecs / scales[:, None]).astype(np.int8)
+        np.save(_vectors_path(output_path), vecs)
+        lines = ({"text": r.get("text"), "metadata": r.get("metadata", {}), "row": i} for i, r in enumerate(records))
+        if scales is not None:
+            lines = ({**line, "scale": float(sc)} for line, sc in zip(lines, scales))
+        _write_jsonl(output_path, lines)
+    else:
+        _write_jsonl(output_path, records)
 
     return {
         "output_path": output_path,
@@ -449,15 +628,21 @@ def load_embeddings_jsonl_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if not input_path or not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
     items: List[Dict[str, Any]] = []
-    with open(input_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            obj = json.loads(line)
-            if not obj.get("embedding"):
-                continue
-            items.append(obj)
+    vectors = None
+    for obj in _read_jsonl(input_path):
+        if "row" in obj and "embedding" not in obj:
+            if vectors is None:
+                import numpy as np
+
+                # Memory-mapped: rows are paged in when Chroma reads them, never parsed from text
+                vectors = np.load(_vectors_path(input_path), mmap_mode="r")
+            vec = vectors[obj["row"]]
+            if "scale" in obj:
+                vec = vec.astype(np.float32) * np.float32(obj.pop("scale"))
+            obj["embedding"] = vec
+        elif not obj.get("embedding"):
+            continue
+        items.append(obj)
     return {
         "items": items,
         "chroma_path": state.get("chroma_path"),
@@ -469,6 +654,7 @@ def load_embeddings_jsonl_node(state: Dict[str, Any]) -> Dict[str, Any]:
 
 def chroma_upsert_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Upsert embeddings into ChromaDB collection."""
+    import numpy as np
     from chromadb import PersistentClient
 
     items: List[Dict[str, Any]] = state.get("items", [])
@@ -500,11 +686,15 @@ def chroma_upsert_node(state: Dict[str, Any]) -> Dict[str, Any]:
                     out[str(k)] = str(v)
         return out
 
+    # One (N, H) float32 matrix up front; each batch upserts a view of it instead of
+    # rebuilding per-row Python float lists
+    vectors = np.asarray([x["embedding"] for x in items], dtype=np.float32)
+
     total = 0
     for i in range(0, len(items), batch_size):
         batch = items[i:i+batch_size]
         ids = [gen_id(x.get("metadata", {})) for x in batch]
-        embeddings = [x["embedding"] for x in batch]
+        embeddings = vectors[i:i+batch_size]
         documents = [x.get("text", "") for x in batch]
         metadatas = [normalize_metadata(x.get("metadata", {})) for x in batch]
         coll.upsert(ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas)
@@ -537,6 +727,11 @@ def load_jsonl_for_ner_node(state: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _in_ner_env(ner_env: str) -> bool:
+    """True when this process already runs in ner_env, so conda run would add nothing."""
+    return os.environ.get("CONDA_DEFAULT_ENV") == ner_env
+
+
 def run_ner_external_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Invoke the ner_runner.py in a different conda env (ner_env) via subprocess/conda run."""
     import subprocess
@@ -557,10 +752,11 @@ def run_ner_external_node(state: Dict[str, Any]) -> Dict[str, Any]:
     device = state.get("device", "cpu")
     aggregation = state.get("aggregation", "simple")
 
-    # Prefer conda run to activate env and execute module
-    cmd = [
-        "conda", "run", "-n", ner_env,
-        "python", "-m", "app.ner_runner",
+    # Prefer conda run to activate env and execute module; already inside ner_env, the
+    # current interpreter runs it directly without conda's start-up
+    cmd = [sys.executable] if _in_ner_env(ner_env) else ["conda", "run", "-n", ner_env, "python"]
+    cmd += [
+        "-m", "app.ner_runner",
         "--input", input_path,
         "--output", output_path,
         "--framework", framework,
@@ -600,20 +796,22 @@ def load_ner_jsonl_node(state: Dict[str, Any]) -> Dict[str, Any]:
     if not input_path or not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
-    items: List[Dict[str, Any]] = []
-    with open(input_path, "r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            try:
-                obj = json.loads(line)
-            except Exception:
-                continue
-            # ensure structure
-            if not isinstance(obj, dict) or "entities" not in obj:
-                continue
-            items.append(obj)
+    try:
+        objs = _read_jsonl(input_path)
+    except ValueError:
+        # Some line is not JSON: parse line by line and drop the malformed ones
+        objs = []
+        with open(input_path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    objs.append(_loads(line))
+                except Exception:
+                    continue
+    # ensure structure
+    items: List[Dict[str, Any]] = [obj for obj in objs if isinstance(obj, dict) and "entities" in obj]
 
     return {
         "items": items,
@@ -626,6 +824,46 @@ def load_ner_jsonl_node(state: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+@functools.lru_cache(maxsize=8192)
+def _entity_keys(label: str, entity_text: str) -> Tuple[str, str, str, Tuple[str, ...], str]:
+    """Derive (entity_key, norm_text, norm_key, aliases, phonetic) once per distinct entity."""
+    label_key = _normalize_label(label)
+    norm = normalize_legal_entity(entity_text)
+    entity_key = f"{label_key}|{_normalize_text(entity_text)}"
+    norm_key = f"{label_key}|{_normalize_text(norm)}"
+    # Build aliases for the entity_text (normalized variants)
+    aliases: List[str] = []
+    if norm:
+        aliases.append(norm)
+    # Also include a cleaned alias without numeric suffixes (footnotes) if any
+    cleaned_alias = _TRAIL_DIGITS_RE.sub("", norm)
+    if cleaned_alias and cleaned_alias != norm:
+        aliases.append(cleaned_alias)
+    for p in _VS_SPLIT_RE.split(norm):
+        alias = normalize_legal_entity(p) if p else ""
+        if alias:
+            aliases.append(alias)
+    combo = normalize_legal_entity(" ".join([p.strip() for p in _VS_SPLIT_RE.split(entity_text)]))
+    if combo:
+        aliases.append(combo)
+    # phonetic alias for cross-spelling tolerance
+    return entity_key, norm, norm_key, tuple(aliases), phonetic_key(norm)
+
+
+# Column order of the per-entity row tuples built by neo4j_ingest_node
+_ROW_COLS = (
+    "doc_id", "source_path", "chunk_id", "chunk_index", "total_chunks", "chunk_uid",
+    "label", "entity_text", "entity_norm_text", "entity_key", "entity_norm_key",
+    "start", "end", "score", "source",
+)
+_ALIAS_COLS = ("entity_key", "alias", "alias_phonetic")
+
+
+def _columns(names: Tuple[str, ...], rows: List[Tuple[Any, ...]]) -> Dict[str, List[Any]]:
+    """Transpose row tuples into one list per column (structure of arrays) for UNWIND."""
+    return {name: list(col) for name, col in zip(names, zip(*rows))}
+
+
 def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Upsert NER results into Neo4j: Document, Chunk, Entity nodes and MENTIONS relationships."""
     from neo4j import GraphDatabase
@@ -656,12 +894,19 @@ def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
             tx.run("CREATE CONSTRAINT IF NOT EXISTS FOR (d:Document) REQUIRE d.id IS UNIQUE")
             tx.run("CREATE CONSTRAINT IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE")
             tx.run("CREATE CONSTRAINT IF NOT EXISTS FOR (e:Entity) REQUIRE e.key IS UNIQUE")
+            # Lookup paths of the retrieve KG query (and of the alias MERGEs below)
+            tx.run("CREATE INDEX IF NOT EXISTS FOR (e:Entity) ON (e.norm_key)")
+            tx.run("CREATE INDEX IF NOT EXISTS FOR (al:Alias) ON (al.name)")
+            tx.run("CREATE INDEX IF NOT EXISTS FOR (pl:PhoneticAlias) ON (pl.code)")
 
         run_session(create_constraints)
 
-        # Prepare rows (one per entity) and alias rows
-        rows: List[Dict[str, Any]] = []
-        alias_rows: List[Dict[str, Any]] = []
+        # Prepare rows (one tuple per entity, in _ROW_COLS order) and alias rows; each
+        # batch is sent as one list per column, so no per-row maps are built or packed
+        rows: List[Tuple[Any, ...]] = []
+        # Insertion-ordered set: an entity seen in many chunks would otherwise MERGE the same
+        # alias once per mention
+        alias_rows: Dict[Tuple[str, str | None, str | None], None] = {}
         for obj in items:
             meta = obj.get("metadata", {}) or {}
             ents = obj.get("entities", []) or []
@@ -692,46 +937,16 @@ def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
                     end = start
                 score = e.get("score")
                 source = e.get("source") or None
-                entity_key = make_entity_key(label, entity_text)
-                norm_text = normalize_legal_entity(entity_text)
-                norm_key = make_entity_key(label, norm_text)
-                rows.append({
-                    "doc_id": doc_id,
-                    "source_path": source_path,
-                    "chunk_id": chunk_id,
-                    "chunk_index": chunk_index,
-                    "total_chunks": total_chunks,
-                    "chunk_uid": chunk_uid,
-                    "label": label,
-                    "entity_text": entity_text,
-                    "entity_norm_text": norm_text,
-                    "entity_key": entity_key,
-                    "entity_norm_key": norm_key,
-                    "start": start,
-                    "end": end,
-                    "score": score,
-                    "source": source,
-                })
-                # Build aliases for the entity_text (normalized variants)
-                norm = norm_text
-                if norm:
-                    alias_rows.append({"entity_key": entity_key, "alias": norm})
-                # Also include a cleaned alias without numeric suffixes (footnotes) if any
-                cleaned_alias = re.sub(r"\d+$", "", normalize_legal_entity(entity_text))
-                if cleaned_alias and cleaned_alias != norm:
-                    alias_rows.append({"entity_key": entity_key, "alias": cleaned_alias})
-                parts = [p for p in re.split(r"\b(?:v|vs)\.?\b", norm) if p]
-                for p in parts:
-                    alias = normalize_legal_entity(p)
-                    if alias:
-                        alias_rows.append({"entity_key": entity_key, "alias": alias})
-                combo = normalize_legal_entity(" ".join([p.strip() for p in re.split(r"\b(?:v|vs)\.?\b", entity_text, flags=re.IGNORECASE)]))
-                if combo:
-                    alias_rows.append({"entity_key": entity_key, "alias": combo})
-                # phonetic alias for cross-spelling tolerance
-                ph = phonetic_key(norm)
+                entity_key, norm_text, norm_key, aliases, ph = _entity_keys(label, entity_text)
+                rows.append((
+                    doc_id, source_path, chunk_id, chunk_index, total_chunks, chunk_uid,
+                    label, entity_text, norm_text, entity_key, norm_key,
+                    start, end, score, source,
+                ))
+                for alias in aliases:
+                    alias_rows[(entity_key, alias, None)] = None
                 if ph:
-                    alias_rows.append({"entity_key": entity_key, "alias_phonetic": ph})
+                    alias_rows[(entity_key, None, ph)] = None
 
         if not rows:
             return {
@@ -741,7 +956,8 @@ def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
             }
 
         cypher = (
-            "UNWIND $rows AS row "
+            "UNWIND range(0, size($cols.doc_id) - 1) AS i "
+            "WITH {" + ", ".join(f"{c}: $cols.{c}[i]" for c in _ROW_COLS) + "} AS row "
             "MERGE (d:Document {id: row.doc_id}) "
             "ON CREATE SET d.source_path = row.source_path "
             "MERGE (c:Chunk {id: row.chunk_uid}) "
@@ -756,23 +972,26 @@ def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
 
         for i in range(0, len(rows), batch_size):
             batch = rows[i:i+batch_size]
+            cols = _columns(_ROW_COLS, batch)
             def ingest_tx(tx):
-                tx.run(cypher, rows=batch)
+                tx.run(cypher, cols=cols)
             run_session(ingest_tx)
             processed += len(batch)
 
         # Insert aliases after entities exist
         if alias_rows:
             cypher_alias = (
-                "UNWIND $alias_rows AS a "
+                "UNWIND range(0, size($aliases.entity_key) - 1) AS i "
+                "WITH {entity_key: $aliases.entity_key[i], alias: $aliases.alias[i], alias_phonetic: $aliases.alias_phonetic[i]} AS a "
                 "MATCH (e:Entity {key: a.entity_key}) "
                 "FOREACH (_ IN CASE WHEN coalesce(a.alias,'') <> '' THEN [1] ELSE [] END | "
                 "  MERGE (al:Alias {name: a.alias})-[:ALIAS_OF]->(e) ) "
                 "FOREACH (_ IN CASE WHEN coalesce(a.alias_phonetic,'') <> '' THEN [1] ELSE [] END | "
                 "  MERGE (pl:PhoneticAlias {code: a.alias_phonetic})-[:PHONETIC_OF]->(e) )"
             )
+            alias_cols = _columns(_ALIAS_COLS, alias_rows)
             def alias_tx(tx):
-                tx.run(cypher_alias, alias_rows=alias_rows)
+                tx.run(cypher_alias, aliases=alias_cols)
             run_session(alias_tx)
     finally:
         driver.close()
@@ -787,170 +1006,255 @@ def neo4j_ingest_node(state: Dict[str, Any]) -> Dict[str, Any]:
 # --------------------- Retrieval pipeline nodes ---------------------
 
 def prepare_query_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    # A list of queries is retrieved as one batch; "query" stays the first of them
     query = state.get("query")
-    if not query or not isinstance(query, str):
+    queries = [query] if isinstance(query, str) else list(query or ())
+    if not queries or not all(q and isinstance(q, str) for q in queries):
         raise ValueError("A non-empty --query string is required for retrieve mode")
+    # StateGraph(dict) replaces the whole state with the node's return value, so pass the
+    # state through and only set what is coerced or defaulted here; later nodes apply
+    # their own defaults for everything else
     return {
-        "query": query,
+        **state,
+        "query": queries[0],
+        "queries": queries,
         "output_path": state.get("output_path") or "retrieved.txt",
-        "framework": state.get("framework", "spacy"),
-        "spacy_model": state.get("spacy_model", "en_legal_ner_trf"),
-        "ner_env": state.get("ner_env", "ner_env"),
-        "model_path": state.get("model_path"),
-        "device": state.get("device"),
         "top_k": int(state.get("top_k", 10)),
         "kg_limit": int(state.get("kg_limit", 25)),
-        "chroma_path": state.get("chroma_path") or ".chroma",
-        "collection": state.get("collection") or "default",
-        "neo4j_uri": state.get("neo4j_uri", "bolt://localhost:7687"),
-        "neo4j_user": state.get("neo4j_user", "neo4j"),
-        "neo4j_password": state.get("neo4j_password"),
-    "neo4j_database": state.get("neo4j_database"),
-    "strict_match": state.get("strict_match", False),
+        # the KG node alone would default to strict
+        "strict_match": state.get("strict_match", False),
     }
 
 
-def ner_query_external_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Run NER on the query using ner_env and return extracted entities (label|text keys)."""
-    import subprocess
-    query: str = state["query"]
-    framework = state.get("framework", "spacy")
-    spacy_model = state.get("spacy_model", "en_legal_ner_trf")
-    ner_env = state.get("ner_env", "ner_env")
+# Query NER workers: one resident ``ner_runner --server`` per (env, framework, model), so
+# repeated retrievals in one process (the API) skip conda start-up and model loading
+_NER_WORKERS: Dict[Tuple[str, str, str], Any] = {}
+_NER_LOCK = threading.Lock()
+
+
+def _close_ner_workers() -> None:
+    for proc in _NER_WORKERS.values():
+        try:
+            proc.stdin.close()  # EOF ends the server loop
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+    _NER_WORKERS.clear()
 
-    # Write a temporary input JSONL with one record
-    tmp_in = tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl")
-    tmp_out = tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl")
-    tmp_in.close(); tmp_out.close()
-    with open(tmp_in.name, "w", encoding="utf-8") as f:
-        json.dump({"text": query, "metadata": {}}, f, ensure_ascii=False)
-        f.write("\n")
 
+def _ner_worker(key: Tuple[str, str, str]):
+    import subprocess
+
+    proc = _NER_WORKERS.get(key)
+    if proc is not None and proc.poll() is None:
+        return proc
+    ner_env, framework, spacy_model = key
     cmd = [
-        "conda", "run", "-n", ner_env,
+        "conda", "run", "--no-capture-output", "-n", ner_env,
         "python", "-m", "app.ner_runner",
-        "--input", tmp_in.name,
-        "--output", tmp_out.name,
+        "--server",
         "--framework", framework,
         "--spacy-model", spacy_model,
         "--batch-size", "1",
     ]
     try:
-        subprocess.run(cmd, check=True)
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
     except FileNotFoundError:
         raise RuntimeError("'conda' not found. Ensure Conda is on PATH.")
+    if not _NER_WORKERS:
+        atexit.register(_close_ner_workers)
+    _NER_WORKERS[key] = proc
+    return proc
+
+
+@functools.lru_cache(maxsize=4)
+def _ner_runner_args(framework: str, spacy_model: str):
+    from . import ner_runner
+    return ner_runner.parse_args(["--framework", framework, "--spacy-model", spacy_model, "--batch-size", "1", "--spacy-nproc", "1"])
 
-    import logging
-    log = logging.getLogger("nlp")
+
+def _ner_request(key: Tuple[str, str, str], request: bytes) -> Dict[str, Any]:
+    """Send one JSONL request line to the resident NER worker; caller holds _NER_LOCK."""
+    line = b""
+    # A worker that died since the last query is restarted once
+    for _ in range(2):
+        proc = _ner_worker(key)
+        try:
+            proc.stdin.write(request)
+            proc.stdin.flush()
+            line = proc.stdout.readline()
+        except OSError:
+            line = b""
+        if line:
+            break
+        _NER_WORKERS.pop(key, None)
+    if not line:
+        raise RuntimeError(f"NER worker in env '{key[0]}' exited; see its error output above")
+    obj = _loads(line)
+    if "error" in obj:
+        raise RuntimeError(f"NER worker failed: {obj['error']}")
+    return obj
+
+
+def _ner_query(key: Tuple[str, str, str], queries: List[str]) -> List[Dict[str, Any]]:
+    """Run NER on each query through the resident NER worker and return the output records.
+    Inside ner_env the records are processed in-process instead (models cached by ner_runner).
+    """
+    records = [{"text": q, "metadata": {}} for q in queries]
+    with _NER_LOCK:
+        if _in_ner_env(key[0]):
+            from . import ner_runner
+            return ner_runner.run_records(_ner_runner_args(key[1], key[2]), records)
+        return [_ner_request(key, _dump_line(rec)) for rec in records]
+
+
+# Same logger as ner_runner's per-hit messages
+_nlp_log = logging.getLogger("nlp")
+
+
+def ner_query_external_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Run NER on the query (or each of ``state["queries"]``) using ner_env and return the
+    extracted entities of all queries (label|text keys).
+    """
+    queries: List[str] = list(state.get("queries") or [state["query"]])
+    framework = state.get("framework", "spacy")
+    spacy_model = state.get("spacy_model", "en_legal_ner_trf")
+    ner_env = state.get("ner_env", "ner_env")
+
+    objs = _ner_query((ner_env, framework, spacy_model), queries)
+
+    log_hits = _nlp_log.isEnabledFor(logging.INFO)
     entities = []
     any_ruler = False
-    with open(tmp_out.name, "r", encoding="utf-8") as f:
-        line = f.readline()
-        if line:
-            obj = json.loads(line)
-            ents = obj.get("entities", []) or []
-            # Augment with domain keywords like "court"
-            ents = _augment_entities_with_keywords(query, ents)
-            for e in ents:
-                text = (e.get("text") or "").strip()
-                label = e.get("label") or ""
-                if text:
-                    key = make_entity_key(label, text)
-                    source = e.get("source")
-                    if source == "ruler":
-                        any_ruler = True
-                        try:
-                            log.info(f"[EntityRuler regex hit] query entity: {text} -> normalized: {normalize_legal_entity(text)}")
-                        except Exception:
-                            pass
-                    entities.append({
-                        "label": str(label),
-                        "text": text,
-                        "key": key,
-                        "source": source,
-                    })
-
-    # Cleanup temp files
-    try:
-        os.remove(tmp_in.name)
-        os.remove(tmp_out.name)
-    except Exception:
-        pass
+    ents = []
+    for query, obj in zip(queries, objs):
+        # Augment with domain keywords like "court"
+        ents.extend(_augment_entities_with_keywords(query, obj.get("entities", []) or []))
+    for e in ents:
+        text = (e.get("text") or "").strip()
+        label = e.get("label") or ""
+        if text:
+            key = make_entity_key(label, text)
+            source = e.get("source")
+            if source == "ruler":
+                any_ruler = True
+                # Only normalize for the message when it will actually be logged
+                if log_hits:
+                    try:
+                        _nlp_log.info(f"[EntityRuler regex hit] query entity: {text} -> normalized: {normalize_legal_entity(text)}")
+                    except Exception:
+                        pass
+            entities.append({
+                "label": str(label),
+                "text": text,
+                "key": key,
+                "source": source,
+            })
 
     # Return merged state since retrieve graph is serialized; preserve prior keys like 'query'
     return {**state, "query_entities": entities, "query_has_ruler": any_ruler}
 
 
-def chroma_query_by_embedding_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Compute embedding for the query and retrieve top_k similar chunks from Chroma.
-    Adds availability flags and captures chroma_ids.
+@functools.lru_cache(maxsize=2)
+def _build_query_encoder(model_dir: str, device_arg: str | None):
+    """Load the query tokenizer/model once per process; loading dominates a single-query encode.
+    On CUDA the weights are loaded in fp16; the pooled mean and L2 norm still run in fp32.
     """
-    import numpy as np
     import torch
     from transformers import AutoTokenizer, AutoModel
+    device = torch.device(device_arg) if device_arg else torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    torch_dtype = torch.float16 if device.type == "cuda" else torch.float32
+    tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
+    model = AutoModel.from_pretrained(model_dir, local_files_only=True, torch_dtype=torch_dtype)
+    model.to(device); model.eval()
+    return tokenizer, model, device
+
+
+@functools.lru_cache(maxsize=4)
+def _chroma_collection(chroma_path: str, collection: str):
+    """Open the retrieval collection once per process; the query and fetch nodes share it."""
     from chromadb import PersistentClient
+    return PersistentClient(path=chroma_path).get_collection(name=collection)
+
+
+def chroma_query_by_embedding_node(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute embeddings for the query (or ``state["queries"]``) and retrieve top_k similar chunks from Chroma.
+    All queries are encoded as one batch and sent in one Chroma query. Adds availability
+    flags and captures chroma_ids (unique, in per-query result order).
+    """
+    import numpy as np
+    import torch
 
     try:
-        query: str = state["query"]
+        queries: List[str] = list(state.get("queries") or [state["query"]])
         model_path: str | None = state.get("model_path")
         if not model_path:
             raise ValueError("--model-path is required to compute query embedding for retrieval")
 
-        # Reuse resolver from embed_node
-        def _resolve_model_dir(root: str) -> str:
-            root = os.path.abspath(root)
-            cfg = os.path.join(root, "config.json")
-            if os.path.isfile(cfg):
-                return root
-            candidates = []
-            for current_root, dirs, files in os.walk(root):
-                rel = os.path.relpath(current_root, root)
-                depth = 0 if rel == "." else rel.count(os.sep) + 1
-                if depth > 4:
-                    dirs[:] = []
-                    continue
-                if "config.json" in files:
-                    score = 0
-                    for tf in ("tokenizer.json", "spiece.model", "vocab.txt", "tokenizer.model"):
-                        if os.path.isfile(os.path.join(current_root, tf)):
-                            score += 1
-                    mtime = os.path.getmtime(current_root)
-                    candidates.append((score, mtime, current_root))
-            if not candidates:
-                raise FileNotFoundError(f"Could not find config.json under: {root}")
-            candidates.sort(key=lambda x: (x[0], x[1]), reverse=True)
-            return candidates[0][2]
-
         model_dir = _resolve_model_dir(model_path)
-        tokenizer = AutoTokenizer.from_pretrained(model_dir, local_files_only=True)
-        model = AutoModel.from_pretrained(model_dir, local_files_only=True)
+        tokenizer, model, device = _build_query_encoder(model_dir, state.get("device"))
 
-        device_arg = state.get("device")
-        device = torch.device(device_arg) if device_arg else torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        model.to(device); model.eval()
-
-        with torch.no_grad():
-            enc = tokenizer([query], padding=True, truncation=True, max_length=512, return_tensors="pt")
-            enc = {k: v.to(device) for k, v in enc.items()}
+        with torch.inference_mode():
+            enc = tokenizer(queries, padding=True, truncation=True, max_length=512, return_tensors="pt")
+            enc = {k: v.to(device, non_blocking=True) for k, v in enc.items()}
             out = model(**enc)
+            # Masked mean as one batched matmul, as in embed_node (no expanded [B,T,H] mask)
             last_hidden = out.last_hidden_state
-            mask = enc["attention_mask"].unsqueeze(-1).expand(last_hidden.size()).float()
-            pooled = (last_hidden * mask).sum(dim=1) / torch.clamp(mask.sum(dim=1), min=1e-9)
+            mask = enc["attention_mask"]
+            summed = torch.einsum("bsh,bs->bh", last_hidden, mask.to(last_hidden.dtype)).float()
+            pooled = summed / mask.sum(dim=1, keepdim=True).clamp_(min=1).float()
             pooled = torch.nn.functional.normalize(pooled, p=2, dim=1)
-            vec = pooled.cpu().numpy().astype(np.float32)[0].tolist()
+            vecs = pooled.cpu().numpy().astype(np.float32)
 
-        client = PersistentClient(path=state.get("chroma_path") or ".chroma")
-        coll = client.get_collection(name=state.get("collection") or "default")
+        coll = _chroma_collection(state.get("chroma_path") or ".chroma", state.get("collection") or "default")
         n = int(state.get("top_k", 10))
         # Request supported fields; ids are returned by default
-        res = coll.query(query_embeddings=[vec], n_results=n, include=["documents", "metadatas", "distances"])  # type: ignore
-        ids = (res.get("ids") or [[]])[0]
+        res = coll.query(query_embeddings=vecs, n_results=n, include=["documents", "metadatas", "distances"])  # type: ignore
+        ids = list(dict.fromkeys(i for per_query in (res.get("ids") or [[]]) for i in per_query))
         return {**state, "embed_results": res, "chroma_ids": ids, "chroma_available": True, "chroma_error": None}
     except Exception as e:
         # Make retrieval resilient if chroma fails
         return {**state, "embed_results": {"ids": [[]]}, "chroma_ids": [], "chroma_available": False, "chroma_error": str(e)}
 
 
+# KG retrieval queries, kept as constants so every call sends the identical text and
+# hits the server's plan cache. Each CALL leg only finds entities (index seeks on
+# key/norm_key/Alias.name/PhoneticAlias.code); chunks are then traversed once per matched
+# entity, carrying every reason that matched it. Hits are grouped per chunk before the
+# LIMIT, so kg_limit bounds distinct chunks (most mentions first), not entity/reason rows.
+_KG_CHUNKS_BY_ENTITY = (
+    "WITH e, collect(reason) AS reasons "
+    "MATCH (c:Chunk)-[:MENTIONS]->(e) "
+    "WITH c, collect(DISTINCT {ekey: e.key, reasons: reasons}) AS hits, count(*) AS cnt "
+    "ORDER BY cnt DESC LIMIT $limit "
+    "UNWIND hits AS hit "
+    "UNWIND hit.reasons AS reason "
+    "RETURN hit.ekey AS ekey, c.id AS id, reason, cnt"
+)
+_KG_QUERY_STRICT = (
+    "CALL { "
+    "MATCH (e:Entity) WHERE e.key IN $keys RETURN e, 'direct' AS reason "
+    "UNION "
+    "MATCH (e:Entity) WHERE e.norm_key IN $norm_keys RETURN e, 'norm_key' AS reason "
+    "UNION "
+    "MATCH (al:Alias)-[:ALIAS_OF]->(e:Entity) WHERE al.name IN $alias_names RETURN e, 'alias' AS reason "
+    "UNION "
+    "MATCH (pl:PhoneticAlias)-[:PHONETIC_OF]->(e:Entity) WHERE pl.code IN $phonetics RETURN e, 'phonetic' AS reason "
+    "} "
+) + _KG_CHUNKS_BY_ENTITY
+# Match by normalized pieces or alias/phonetic (label-agnostic)
+_KG_QUERY_TEXT_ONLY = (
+    "CALL { "
+    "MATCH (e:Entity) WHERE split(e.key,'|')[1] IN $norms OR split(e.norm_key,'|')[1] IN $norms "
+    "RETURN e, 'text_norm' AS reason "
+    "UNION "
+    "MATCH (al:Alias)-[:ALIAS_OF]->(e:Entity) WHERE al.name IN $norms RETURN e, 'alias' AS reason "
+    "UNION "
+    "MATCH (pl:PhoneticAlias)-[:PHONETIC_OF]->(e:Entity) WHERE pl.code IN $phonetics RETURN e, 'phonetic' AS reason "
+    "} "
+) + _KG_CHUNKS_BY_ENTITY
+
+
 def neo4j_query_by_entities_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Retrieve chunk IDs from Neo4j for the query entities with availability flags.
     Also returns which query keys actually exist in the KG for debugging (kg_matched_keys).
@@ -967,19 +1271,20 @@ def neo4j_query_by_entities_node(state: Dict[str, Any]) -> Dict[str, Any]:
         if not e.get("text"):
             continue
         label = e.get("label")
-        text = e.get("text")
-        keys.append(make_entity_key(label, text))
-        nt = normalize_legal_entity(text)
+        # Same memoized derivation as ingest, so query and stored keys always agree
+        key, nt, norm_key, _, ph = _entity_keys(label, e.get("text"))
+        keys.append(key)
         if nt:
             norm_aliases.append(nt)
             # label-aware normalized key for matching Entity.norm_key
             if label is not None:
-                norm_keys.append(make_entity_key(label, nt))
-            ph = phonetic_key(nt)
+                norm_keys.append(norm_key)
             if ph:
                 phonetics.append(ph)
     if not keys:
         return {**state, "kg_ids": [], "kg_available": True, "kg_error": None, "kg_matched_keys": [], "kg_requested_keys": []}
+    # Alias names are the text part of the strict keys
+    alias_names = [k.split("|")[1] for k in keys]
     strict = bool(state.get("strict_match", True))
     uri = state.get("neo4j_uri", "bolt://localhost:7687")
     user = state.get("neo4j_user", "neo4j")
@@ -1001,77 +1306,31 @@ def neo4j_query_by_entities_node(state: Dict[str, Any]) -> Dict[str, Any]:
                     return session.execute_read(tx_func)
 
         def query_tx_strict(tx):
-            cypher = (
-                "UNWIND $keys AS key "
-                "MATCH (e:Entity {key: key})<-[:MENTIONS]-(c:Chunk) "
-                "RETURN e.key AS ekey, c.id AS id, 'direct' AS reason, count(*) AS cnt "
-                "UNION "
-                "UNWIND $norm_keys AS nkey "
-                "MATCH (e:Entity {norm_key: nkey})<-[:MENTIONS]-(c:Chunk) "
-                "RETURN e.key AS ekey, c.id AS id, 'norm_key' AS reason, count(*) AS cnt "
-                "UNION "
-                "UNWIND $keys AS key "
-                "WITH split(key,'|')[1] AS norm_text "
-                "MATCH (al:Alias {name: norm_text})-[:ALIAS_OF]->(e:Entity) "
-                "MATCH (c:Chunk)-[:MENTIONS]->(e) "
-                "RETURN e.key AS ekey, c.id AS id, 'alias' AS reason, count(*) AS cnt "
-                "UNION "
-                "UNWIND $keys AS key "
-                "WITH split(key,'|')[1] AS norm_text, $phonetics AS phs "
-                "UNWIND phs AS ph "
-                "MATCH (pl:PhoneticAlias {code: ph})-[:PHONETIC_OF]->(e:Entity) "
-                "MATCH (c:Chunk)-[:MENTIONS]->(e) "
-                "RETURN e.key AS ekey, c.id AS id, 'phonetic' AS reason, count(*) AS cnt"
-            )
-            result = tx.run(cypher, keys=keys, norm_keys=norm_keys, phonetics=phonetics, limit=limit)
+            result = tx.run(_KG_QUERY_STRICT, keys=keys, norm_keys=norm_keys, alias_names=alias_names, phonetics=phonetics, limit=limit)
             return [(r["ekey"], r["id"], r["reason"], r["cnt"]) for r in result]
 
         def query_tx_text_only(tx):
-            # Match by normalized pieces or alias/phonetic (label-agnostic)
-            cypher = (
-                "UNWIND $norms AS norm_text "
-                "MATCH (e:Entity) WHERE split(e.key,'|')[1] = norm_text OR split(e.norm_key,'|')[1] = norm_text "
-                "MATCH (c:Chunk)-[:MENTIONS]->(e) "
-                "RETURN e.key AS ekey, c.id AS id, 'text_norm' AS reason, count(*) AS cnt "
-                "UNION "
-                "UNWIND $norms AS norm_text "
-                "MATCH (al:Alias {name: norm_text})-[:ALIAS_OF]->(e:Entity) "
-                "MATCH (c:Chunk)-[:MENTIONS]->(e) "
-                "RETURN e.key AS ekey, c.id AS id, 'alias' AS reason, count(*) AS cnt "
-                "UNION "
-                "UNWIND $phonetics AS ph "
-                "MATCH (pl:PhoneticAlias {code: ph})-[:PHONETIC_OF]->(e:Entity) "
-                "MATCH (c:Chunk)-[:MENTIONS]->(e) "
-                "RETURN e.key AS ekey, c.id AS id, 'phonetic' AS reason, count(*) AS cnt"
-            )
-            result = tx.run(cypher, norms=norm_aliases, phonetics=phonetics, limit=limit)
+            result = tx.run(_KG_QUERY_TEXT_ONLY, norms=norm_aliases, phonetics=phonetics, limit=limit)
             return [(r["ekey"], r["id"], r["reason"], r["cnt"]) for r in result]
 
         rows = run_session(query_tx_strict) or []
         if not rows and not strict:
             rows = run_session(query_tx_text_only) or []
-        ids = []
+        # One pass: dedupe ids in order, collect reasons, and pick ruler-hit ids (alias/phonetic
+        # matches, only if the query had ruler entities)
+        ordered: Dict[str, None] = {}
         reasons_map: Dict[str, set] = {}
         matched_keys_set = set()
+        ruler_hits: Dict[str, None] = {}
         ruler_query = bool(state.get("query_has_ruler", False))
         for key, cid, reason, cnt in rows:
             matched_keys_set.add(key)
-            ids.append(cid)
+            ordered[cid] = None
             reasons_map.setdefault(cid, set()).add(reason)
-        # Maintain order while deduping ids
-        seen = set()
-        ordered_ids = []
-        for cid in ids:
-            if cid not in seen:
-                ordered_ids.append(cid)
-                seen.add(cid)
-        # Compute ruler-hit ids: only if alias/phonetic reason used AND query had ruler entities
-        ruler_hit_ids = []
-        if ruler_query:
-            for cid in ordered_ids:
-                reasons = reasons_map.get(cid, set())
-                if any(r in ("alias", "phonetic") for r in reasons):
-                    ruler_hit_ids.append(cid)
+            if ruler_query and reason in ("alias", "phonetic"):
+                ruler_hits[cid] = None
+        ordered_ids = list(ordered)
+        ruler_hit_ids = list(ruler_hits)
         return {**state, "kg_ids": ordered_ids, "kg_available": True, "kg_error": None, "kg_matched_keys": sorted(matched_keys_set), "kg_requested_keys": keys, "kg_match_reasons": {k: sorted(list(v)) for k, v in reasons_map.items()}, "kg_ruler_hit_ids": ruler_hit_ids}
     except Exception as e:
         return {**state, "kg_ids": [], "kg_available": False, "kg_error": str(e), "kg_matched_keys": [], "kg_requested_keys": keys}
@@ -1082,28 +1341,27 @@ def neo4j_query_by_entities_node(state: Dict[str, Any]) -> Dict[str, Any]:
             pass
 
 
+# merge_ids_node provenance bits; _PROV_TAGS[mask] is the sorted tag list
+_PROV_CHROMA = 1
+_PROV_KG = 2
+_PROV_TAGS = ((), ("chroma",), ("kg",), ("chroma", "kg"))
+
+
 def merge_ids_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """Merge ids from KG and embeddings with KG-priority reranking.
 
     Order:
     1) All ids that appear in KG results (kg_ids) in their given order.
-    2) Remaining embedding-only ids in their embedding order.
+    2) Remaining embedding-only ids in their embedding order (rank-interleaved across queries).
     Truncate to top_k and compute provenance/source counts.
     """
     emb = state.get("embed_results") or {}
-    emb_ids: list[str] = (emb.get("ids") or [[ ]])[0]
+    # Several queries: interleave their hits rank by rank so each query contributes
+    emb_ids: list[str] = [i for hits in zip_longest(*(emb.get("ids") or [[ ]])) for i in hits if i is not None]
     kg_ids: list[str] = list(state.get("kg_ids", []))
 
-    seen = set()
-    ordered: list[str] = []
-    # 1) KG-backed ids first (preserve kg order)
-    for kid in kg_ids:
-        if kid not in seen:
-            ordered.append(kid); seen.add(kid)
-    # 2) Then remaining embedding-only ids (preserve embedding order)
-    for eid in emb_ids:
-        if eid not in seen:
-            ordered.append(eid); seen.add(eid)
+    # KG-backed ids first, then embedding-only ids, each in its own order
+    ordered = list(dict.fromkeys([*kg_ids, *emb_ids]))
 
     # Truncate to top_k
     top_k = int(state.get("top_k", 10))
@@ -1111,16 +1369,16 @@ def merge_ids_node(state: Dict[str, Any]) -> Dict[str, Any]:
 
     # provenance and source counts
     chroma_ids = list(state.get("chroma_ids") or emb_ids or [])
-    prov: Dict[str, set] = {}
+    # Source bitmask per id; the tag lists are only built for the selected ids
+    prov: Dict[str, int] = dict.fromkeys(chroma_ids, _PROV_CHROMA)
     prov_extra: Dict[str, list] = {}
-    for cid in chroma_ids:
-        prov.setdefault(cid, set()).add("chroma")
     for kid in kg_ids:
-        prov.setdefault(kid, set()).add("kg")
+        prov[kid] = prov.get(kid, 0) | _PROV_KG
     # Add extra provenance tag if KG match via alias/phonetic and query had ruler hits
     for cid in state.get("kg_ruler_hit_ids", []) or []:
         prov_extra.setdefault(cid, []).append("EntityRuler regex hit")
-    both = [i for i in chroma_ids if i in set(kg_ids)]
+    kg_set = set(kg_ids)
+    both = [i for i in chroma_ids if i in kg_set]
     source_counts = {
         "chroma": len(chroma_ids),
         "kg": len(kg_ids),
@@ -1129,23 +1387,33 @@ def merge_ids_node(state: Dict[str, Any]) -> Dict[str, Any]:
         "chroma_available": bool(state.get("chroma_available", False)),
         "kg_available": bool(state.get("kg_available", False)),
     }
-    return {**state, "final_ids": final_ids, "provenance": {k: sorted(list(v)) for k, v in prov.items()}, "provenance_extra": prov_extra, "source_counts": source_counts}
+    # Only the selected ids are ever reported, so do not carry provenance for the rest
+    provenance = {i: list(_PROV_TAGS[prov.get(i, 0)]) for i in final_ids}
+    return {**state, "final_ids": final_ids, "provenance": provenance, "provenance_extra": prov_extra, "source_counts": source_counts}
 
 
 def fetch_docs_by_ids_node(state: Dict[str, Any]) -> Dict[str, Any]:
-    """Fetch documents from Chroma by ids for the final selection."""
-    from chromadb import PersistentClient
+    """Fetch documents for the final selection; only ids Chroma did not already return are fetched."""
     ids = state.get("final_ids", [])
     if not ids:
         return {**state, "final_docs": [], "fetched_ids": [], "fetched_metas": []}
-    client = PersistentClient(path=state.get("chroma_path") or ".chroma")
-    coll = client.get_collection(name=state.get("collection") or "default")
-    # Chroma does not support "ids" in include; ids are returned by default
-    got = coll.get(ids=ids, include=["documents", "metadatas"])  # type: ignore
-    # Map id -> document for ordering
-    id_to_doc = {i: d for i, d in zip(got.get("ids", []), got.get("documents", []))}
-    docs = [id_to_doc.get(i, "") for i in ids]
-    return {**state, "final_docs": docs, "fetched_ids": got.get("ids", []), "fetched_metas": got.get("metadatas", [])}
+    # The embedding query already returned documents/metadatas for its hits
+    emb = state.get("embed_results") or {}
+    id_to_doc: Dict[str, Any] = {}
+    id_to_meta: Dict[str, Any] = {}
+    for q_ids, q_docs, q_metas in zip(emb.get("ids") or (), emb.get("documents") or (), emb.get("metadatas") or ()):
+        id_to_doc.update(zip(q_ids, q_docs))
+        id_to_meta.update(zip(q_ids, q_metas))
+    missing = [i for i in ids if i not in id_to_doc]
+    if missing:
+        coll = _chroma_collection(state.get("chroma_path") or ".chroma", state.get("collection") or "default")
+        # Chroma does not support "ids" in include; ids are returned by default
+        got = coll.get(ids=missing, include=["documents", "metadatas"])  # type: ignore
+        id_to_doc.update(zip(got.get("ids") or (), got.get("documents") or ()))
+        id_to_meta.update(zip(got.get("ids") or (), got.get("metadatas") or ()))
+    docs = [d or "" for d in map(id_to_doc.get, ids)]
+    fetched_ids = [i for i in ids if i in id_to_doc]
+    return {**state, "final_docs": docs, "fetched_ids": fetched_ids, "fetched_metas": list(map(id_to_meta.get, fetched_ids))}
 
 
 def save_retrieved_text_node(state: Dict[str, Any]) -> Dict[str, Any]:
@@ -1164,8 +1432,8 @@ def save_retrieved_text_node(state: Dict[str, Any]) -> Dict[str, Any]:
             f"# sources: chroma={'yes' if chroma_avail else 'no'}, kg={'yes' if kg_avail else 'no'}; "
             f"counts: selected={counts.get('selected', len(ids))}, chroma={counts.get('chroma', 0)}, kg={counts.get('kg', 0)}, both={counts.get('both', 0)}"
         )
-        f.write(summary_line + "\n\n")
-        for i, (cid, text) in enumerate(zip(ids, docs)):
+        parts = [summary_line + "\n\n"]
+        for cid, text in zip(ids, docs):
             tags = "+".join(prov.get(cid, [])) if cid in prov else ""
             header = f"### {cid}"
             if tags:
@@ -1173,7 +1441,6 @@ def save_retrieved_text_node(state: Dict[str, Any]) -> Dict[str, Any]:
             extras = prov_extra.get(cid)
             if extras:
                 header += " " + " ".join(f"[{e}]" for e in extras)
-            f.write(header + "\n")
-            f.write((text or "").strip())
-            f.write("\n\n")
+            parts.append(f"{header}\n{(text or '').strip()}\n\n")
+        f.writelines(parts)
     return {**state, "output_path": output_path}
@@ -0,0 +1,82 @@
+"""
+Array-based overlap resolution for candidate entity spans.
+
+Equivalent to ``spacy.util.filter_spans`` (longest first, then earliest start), with an
+optional per-label priority between equally long spans. The ordering is one stable argsort
+of packed uint64 keys and the greedy sweep runs over int32 arrays; when Numba is installed
+the sweep is JIT-compiled, otherwise it falls back to the same loop in Python.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from numba import njit  # type: ignore
+except ImportError:  # pragma: no cover - optional dependency
+    njit = None
+
+
+def _sweep(order, starts, ends, size):
+    taken = np.zeros(size, dtype=np.bool_)
+    keep = np.zeros(order.shape[0], dtype=np.bool_)
+    for k in range(order.shape[0]):
+        i = order[k]
+        free = True
+        for t in range(starts[i], ends[i]):
+            if taken[t]:
+                free = False
+                break
+        if free:
+            keep[i] = True
+            for t in range(starts[i], ends[i]):
+                taken[t] = True
+    return keep
+
+
+if njit is not None:
+    _sweep = njit(cache=True)(_sweep)
+
+
+def pack(starts: np.ndarray, ends: np.ndarray, prio: np.ndarray) -> np.ndarray:
+    """Pack the sort order into one uint64 per span: [~length:16][~prio:8][start:40].
+
+    Ascending keys then mean longest first, highest int8 prio next, earliest start last.
+    """
+    length = np.minimum(ends - starts, 0xFFFF).astype(np.uint64)
+    rank = (127 - prio.astype(np.int64)).astype(np.uint64)
+    return ((0xFFFF - length) << np.uint64(48)) | (rank << np.uint64(40)) | starts.astype(np.uint64)
+
+
+def resolve(starts: np.ndarray, ends: np.ndarray, prio: Optional[np.ndarray] = None) -> np.ndarray:
+    """Return a boolean mask of the spans kept: longest first, then highest prio, then earliest start."""
+    starts = np.asarray(starts, dtype=np.int32)
+    ends = np.asarray(ends, dtype=np.int32)
+    if starts.shape[0] == 0:
+        return np.zeros(0, dtype=np.bool_)
+    if prio is None:
+        prio = np.zeros(starts.shape[0], dtype=np.int8)
+    # One integer compare per pair; stable so identical keys keep input order like filter_spans
+    order = np.argsort(pack(starts, ends, np.asarray(prio, dtype=np.int8)), kind="stable").astype(np.int32)
+    return _sweep(order, starts, ends, int(ends.max()))
+
+
+def filter_spans(spans: Sequence, priority: Optional[Dict[str, int]] = None) -> List:
+    """Drop overlapping spaCy spans like ``spacy.util.filter_spans``; result is in document order."""
+    if not spans:
+        return []
+    starts = np.fromiter((sp.start for sp in spans), dtype=np.int32, count=len(spans))
+    ends = np.fromiter((sp.end for sp in spans), dtype=np.int32, count=len(spans))
+    prio = None
+    if priority:
+        prio = np.fromiter((priority.get(sp.label_, 0) for sp in spans), dtype=np.int8, count=len(spans))
+    keep = resolve(starts, ends, prio)
+    kept = [spans[i] for i in np.flatnonzero(keep)]
+    kept.sort(key=lambda sp: sp.start)
+    return kept
+
+
+# Compile the sweep at import so the first document does not pay for it
+resolve(np.array([0, 1, 0]), np.array([1, 2, 2]))
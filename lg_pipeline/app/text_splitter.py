@@ -0,0 +1,110 @@
+"""
+Drop-in ``RecursiveCharacterTextSplitter`` with a linear-time merge step.
+
+LangChain's ``_merge_splits`` drops pieces from the front of the running chunk with
+``current_doc = current_doc[1:]``, copying the list on every pop, and re-measures each
+piece it drops; on long texts split down to words that quadratic merge is most of the
+split time. This subclass keeps the same algorithm over a deque with cached lengths, so
+chunk boundaries and text are identical to LangChain's for the same settings.
+
+``merge_small_chunks`` is an optional second pass (split, then merge) that joins runs of
+short adjacent chunks, such as headings and short paragraphs, into one chunk.
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+from collections import deque
+from typing import Iterable, List, Optional, Tuple
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Same logger as LangChain so oversize-chunk warnings are reported where they always were
+logger = logging.getLogger("langchain_text_splitters.base")
+
+
+class LinearMergeSplitter(RecursiveCharacterTextSplitter):
+    def _merge_splits(self, splits: Iterable[str], separator: str) -> List[str]:
+        length = self._length_function
+        chunk_size = self._chunk_size
+        chunk_overlap = self._chunk_overlap
+        separator_len = length(separator)
+
+        docs: List[str] = []
+        current: deque = deque()
+        lengths: deque = deque()
+        total = 0
+        for d in splits:
+            len_ = length(d)
+            if total + len_ + (separator_len if current else 0) > chunk_size:
+                if total > chunk_size:
+                    logger.warning(
+                        "Created a chunk of size %d, which is longer than the specified %d",
+                        total,
+                        chunk_size,
+                    )
+                if current:
+                    doc = self._join_docs(current, separator)
+                    if doc is not None:
+                        docs.append(doc)
+                    # Pop from the front while over the overlap, or while the next piece
+                    # would still not fit
+                    while total > chunk_overlap or (
+                        total + len_ + (separator_len if current else 0) > chunk_size and total > 0
+                    ):
+                        total -= lengths.popleft() + (separator_len if len(current) > 1 else 0)
+                        current.popleft()
+            current.append(d)
+            lengths.append(len_)
+            total += len_ + (separator_len if len(current) > 1 else 0)
+        doc = self._join_docs(current, separator)
+        if doc is not None:
+            docs.append(doc)
+        return docs
+
+
+@functools.lru_cache(maxsize=8)
+def get_splitter(chunk_size: int, chunk_overlap: int, separators: Optional[Tuple[str, ...]] = None) -> LinearMergeSplitter:
+    """Shared splitter per configuration; splitters hold no per-text state."""
+    return LinearMergeSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        separators=list(separators) if separators else None,
+    )
+
+
+# Merged chunks may exceed chunk_size by this factor
+MERGE_TOLERANCE = 1.15
+
+
+def merge_small_chunks(text: str, chunks: List[str], chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Greedily merge adjacent chunks while the covered span of ``text`` stays within tolerance.
+
+    Chunks are located in ``text`` the way LangChain computes ``start_index``, and a merged
+    chunk is the original text from the first chunk's start to the last chunk's end, so
+    overlapping text is not repeated. Full-size neighbours do not fit, so only short runs merge.
+    """
+    if len(chunks) < 2:
+        return chunks
+    spans: List[Tuple[int, int]] = []
+    index = 0
+    previous_len = 0
+    for chunk in chunks:
+        index = text.find(chunk, max(0, index + previous_len - chunk_overlap))
+        if index < 0:  # not a plain substring (custom length/regex settings); leave as is
+            return chunks
+        previous_len = len(chunk)
+        spans.append((index, index + previous_len))
+
+    limit = int(chunk_size * MERGE_TOLERANCE)
+    merged: List[str] = []
+    cur_start, cur_end = spans[0]
+    for start, end in spans[1:]:
+        if max(cur_end, end) - cur_start <= limit:
+            cur_end = max(cur_end, end)
+        else:
+            merged.append(text[cur_start:cur_end])
+            cur_start, cur_end = start, end
+    merged.append(text[cur_start:cur_end])
+    return merged
@@ -1,29 +1,41 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TypedDict
 
 
-@dataclass
+# slots: no per-instance __dict__, which adds up over hundreds of thousands of chunks
+@dataclass(slots=True)
 class SplitterConfig:
     chunk_size: int = 1200
     chunk_overlap: int = 200
     separators: List[str] | None = None
 
 
-@dataclass
+class ChunkMeta(TypedDict, total=False):
+    """Metadata split_node attaches to each DOCX chunk."""
+    source_path: str
+    doc_id: str
+    created_at: str
+    splitter_config: Dict[str, Any]
+    chunk_id: int
+    chunk_index: int
+    total_chunks: int
+
+
+@dataclass(slots=True)
 class Chunk:
     text: str
-    metadata: Dict[str, Any]
+    metadata: ChunkMeta
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineInput:
     input_path: str
     output_path: str | None
     config: SplitterConfig
 
 
-@dataclass
+@dataclass(slots=True)
 class PipelineOutput:
     output_path: str
     chunks: List[Chunk]
@@ -6,6 +6,7 @@ from app.legal_normalizer import (
     collapse_initials,
     expand_abbreviations,
     normalize_sections,
+    roman_to_int,
     phonetic_key,
     normalize_legal_entity,
 )
@@ -35,6 +36,14 @@ def test_normalize_sections_roman_and_numeric():
     assert "section 304b" in out.lower()
 
 
+def test_roman_to_int_table_and_fallback():
+    assert roman_to_int("xlix") == 49
+    assert roman_to_int("CCCXCIX") == 399
+    # Non-canonical and out-of-table numerals still go through the parser
+    assert roman_to_int("IIII") == 4
+    assert roman_to_int("MCMXCIV") == 1994
+
+
 def test_phonetic_key_stability():
     assert phonetic_key("Kaladevi") == phonetic_key("Kala Devi")
 
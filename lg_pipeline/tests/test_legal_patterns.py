@@ -1,4 +1,5 @@
 from __future__ import annotations
+import pytest
 import spacy
 from spacy.pipeline import EntityRuler
 from app.legal_patterns import patterns as LEGAL_PATTERNS
@@ -13,27 +14,35 @@ def make_nlp():
     return nlp
 
 
+@pytest.fixture(scope="module")
+def nlp():
+    # Adding the patterns dominates; the pipeline holds no per-text state, so share it
+    return make_nlp()
+
+
 def extract(nlp, text):
     doc = nlp(text)
     return [(ent.text, ent.label_) for ent in doc.ents]
 
 
-def test_case_citation_patterns():
-    nlp = make_nlp()
+def test_case_citation_patterns(nlp):
     assert ("(2005) 2 SCC 123", "CASE_CITATION") in extract(nlp, "As held in (2005) 2 SCC 123 ...")
     assert ("AIR 1999 SC 456", "CASE_CITATION") in extract(nlp, "Cited AIR 1999 SC 456")
 
 
-def test_statute_and_section_patterns():
-    nlp = make_nlp()
+def test_statute_and_section_patterns(nlp):
     txt = "S. 49 of the IPC and Section XLIX of the Evidence Act"
     ents = extract(nlp, txt)
     assert ("S. 49", "STATUTE_SECTION") in ents or ("S. 49 of the", "STATUTE_SECTION") in ents
     assert any(lbl == "STATUTE" for _, lbl in ents)
 
 
-def test_court_and_case_number_dates():
-    nlp = make_nlp()
+def test_section_with_subsections(nlp):
+    assert ("Sec. 34(1)", "STATUTE_SECTION") in extract(nlp, "Sec. 34(1) of the Act")
+    assert ("Section 302(1)(a)", "STATUTE_SECTION") in extract(nlp, "Section 302(1)(a) IPC")
+
+
+def test_court_and_case_number_dates(nlp):
     txt = "Supreme Court of India in CRP.PD. No. 2828 of 2015 on 01.01.2000"
     ents = extract(nlp, txt)
     assert ("Supreme Court of India", "COURT") in ents
@@ -41,10 +50,37 @@ def test_court_and_case_number_dates():
     assert any(lbl == "DATE" for _, lbl in ents)
 
 
-def test_judge_pattern_and_normalization():
-    nlp = make_nlp()
+def test_judge_pattern_and_normalization(nlp):
     txt = "Hon'ble Justice Pamidighantam Sri Narasimha"
     ents = extract(nlp, txt)
     assert any(lbl == "JUDGE" for _, lbl in ents)
     # normalization check
     assert normalize_legal_entity("Hon'ble Justice Pamidighantam Sri Narasimha") != ""
+
+
+def test_phrase_matcher_and_merged_regexes_match_flat_patterns(nlp):
+    from app.legal_patterns import REGEX_PATTERNS, add_phrase_matcher, build_patterns, rule_id
+
+    flat = nlp
+    split = spacy.blank("en")
+    split.add_pipe("entity_ruler").add_patterns(build_patterns(REGEX_PATTERNS))
+    add_phrase_matcher(split)
+    txt = "Supreme Court of India: IPC and Cr.P.C. read with Article21 before DelHC on 01.01.2000, Respondent"
+    want = [(ent.text, ent.label_, ent.ent_id_) for ent in flat(txt).ents]
+    got = [(ent.text, ent.label_, rule_id(ent.label_, ent.ent_id_, ent.text)) for ent in split(txt).ents]
+    assert want and got == want
+
+
+def test_longer_token_pattern_beats_contained_phrase(nlp, tmp_path):
+    from app.ner_runner import _build_spacy_pipeline
+
+    # The pipeline ner_runner builds must pick the same spans as the single flat ruler
+    spacy.blank("en").to_disk(tmp_path / "blank")
+    pipeline = _build_spacy_pipeline(str(tmp_path / "blank"), "ruler")
+    for txt, want in [
+        ("Tripura High Court", ("Tripura High Court", "COURT", "COURT:generic_hc")),
+        ("RAMESH KUMAR Respondent", ("RAMESH KUMAR Respondent", "PARTY", "PARTY:title_line")),
+    ]:
+        got = [(ent.text, ent.label_, ent.ent_id_) for ent in pipeline(txt).ents]
+        assert got == [want]
+        assert got == [(ent.text, ent.label_, ent.ent_id_) for ent in nlp(txt).ents]
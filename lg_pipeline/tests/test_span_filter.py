@@ -0,0 +1,26 @@
+from __future__ import annotations
+import random
+
+import spacy
+from spacy.tokens import Span
+from spacy.util import filter_spans as spacy_filter_spans
+
+from app.span_filter import filter_spans, resolve
+
+
+def test_filter_spans_matches_spacy():
+    nlp = spacy.blank("en")
+    doc = nlp.make_doc(" ".join(f"w{i}" for i in range(40)))
+    rnd = random.Random(0)
+    for _ in range(200):
+        spans = []
+        for _ in range(rnd.randint(0, 25)):
+            start = rnd.randrange(40)
+            spans.append(Span(doc, start, min(40, start + rnd.randint(1, 6)), label=rnd.choice(["A", "B"])))
+        want = [(sp.start, sp.end, sp.label_) for sp in spacy_filter_spans(spans)]
+        assert [(sp.start, sp.end, sp.label_) for sp in filter_spans(spans)] == want
+
+
+def test_priority_breaks_length_ties():
+    keep = resolve([0, 0, 3], [2, 2, 4], prio=[0, 5, 0])
+    assert keep.tolist() == [False, True, True]
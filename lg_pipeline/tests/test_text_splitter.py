@@ -0,0 +1,28 @@
+from __future__ import annotations
+import random
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.text_splitter import LinearMergeSplitter, merge_small_chunks
+
+
+def test_linear_merge_matches_langchain():
+    rnd = random.Random(0)
+    for _ in range(300):
+        text = "".join(rnd.choice("ab cd\n\n\nef. g") for _ in range(rnd.randint(0, 2000)))
+        chunk_size = rnd.randint(1, 200)
+        kwargs = dict(
+            chunk_size=chunk_size,
+            chunk_overlap=rnd.randint(0, chunk_size),
+            keep_separator=rnd.choice([True, False, "start", "end"]),
+        )
+        want = RecursiveCharacterTextSplitter(**kwargs).split_text(text)
+        assert LinearMergeSplitter(**kwargs).split_text(text) == want
+
+
+def test_merge_small_chunks_joins_short_neighbours():
+    text = "a" * 95 + "\n\nShort.\n\n" + "c" * 95
+    chunks = LinearMergeSplitter(chunk_size=100, chunk_overlap=0).split_text(text)
+    assert chunks == ["a" * 95, "Short.", "c" * 95]
+    merged = merge_small_chunks(text, chunks, chunk_size=100, chunk_overlap=0)
+    assert merged == ["a" * 95 + "\n\nShort.", "c" * 95]